@@ -0,0 +1,181 @@
+"""
+Batch analysis of many punch files (e.g. one export per site or branch)
+under the same column mapping and shift rules. Files are read and analysed
+concurrently on a thread pool, each through the parsed-punch cache, and the
+per-file summaries are stacked into a combined one with a Source column.
+
+    results, failed = analyze_batch(["exports/"], col_map, shifts, holidays)
+    summary_df, status_df, names = combine(results)
+"""
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import engine
+import ingest
+from profiler import NULL_PROFILER, StageProfiler
+
+PUNCH_EXTENSIONS = ('.xlsx', '.xls', '.csv')
+# Last summary column of a combined run: the file each row came from
+SOURCE_COLUMN = "Source"
+
+# =============================================================================
+# INPUT FILES
+# =============================================================================
+def collect_files(sources):
+    """
+    Punch files from a mix of file and folder paths: folders contribute their
+    .xlsx/.xls/.csv files (not recursively, Excel lock files skipped), in
+    name order. Each file is listed once.
+    """
+    files = []
+    for src in sources:
+        if os.path.isdir(src):
+            files.extend(os.path.join(src, f) for f in sorted(os.listdir(src))
+                         if f.lower().endswith(PUNCH_EXTENSIONS) and not f.startswith("~$"))
+        else:
+            files.append(src)
+    return list(dict.fromkeys(os.path.abspath(f) for f in files))
+
+def source_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+def unique_labels(names, limit=None, taken=()):
+    # `names` cut to `limit` characters and suffixed " (2)", " (3)"... where they clash (case-insensitive)
+    used, labels = {t.lower() for t in taken}, []
+    for name in names:
+        base = name[:limit] if limit else name
+        label, k = base, 2
+        while label.lower() in used:
+            suffix = f" ({k})"
+            label, k = (base[:limit - len(suffix)] if limit else base) + suffix, k + 1
+        used.add(label.lower())
+        labels.append(label)
+    return labels
+
+# =============================================================================
+# ANALYSIS
+# =============================================================================
+def analyze_file(path, col_map, shift_cal, holidays, store=None, source=None, log=None, prof=NULL_PROFILER,
+                 cancelled=None):
+    """
+    One file of the batch, the same way a GUI run does it: cached parsed
+    punches when `store` has them (written back otherwise), then the
+    vectorized analysis. Returns a result dict (path, source label,
+    summary_df, status_df, names).
+    """
+    file_key = store.file_key(path) if store is not None and store.enabled else None
+    df = ingest.load_window(col_map, shift_cal.start, shift_cal.end, path=path, store=store, file_key=file_key,
+                            log=log, shift_cal=shift_cal, prof=prof, cancelled=cancelled)
+    if cancelled and cancelled():
+        raise engine.Cancelled()
+    emp_index = engine.EmployeeIndex(df, col_map['name'], col_map['date'])
+    summary_df, status_df = engine.analyze(df, shift_cal, holidays, engine.punch_columns(col_map), log=log,
+                                           emp_index=emp_index, prof=prof)
+    return {"path": path, "source": source or source_name(path), "summary_df": summary_df, "status_df": status_df,
+            "names": summary_df["Name"].to_numpy()}
+
+def analyze_batch(sources, col_map, shifts, holidays, workers=None, use_cache=True, log=None, progress=None,
+                  cancelled=None, prof=NULL_PROFILER):
+    """
+    Analyses every file in `sources` (files and/or folders, see
+    collect_files) on `workers` threads (default: one per CPU, at most one
+    per file). Reading and NumPy work release the GIL, and the threads share
+    engine.PUNCH_CACHE, so clock strings repeated across branch exports are
+    parsed once. A file that fails is logged and skipped; progress(done,
+    total) is called as files finish, and once `cancelled()` is true, files
+    not yet started are dropped and engine.Cancelled is raised.
+    Returns (results in input order, {path: error message}).
+    """
+    paths = collect_files(sources)
+    if not paths:
+        raise ValueError("No punch files (.xlsx, .xls, .csv) found.")
+    labels = dict(zip(paths, unique_labels([source_name(p) for p in paths])))
+    shift_cal = shifts if isinstance(shifts, engine.ShiftCalendar) else engine.ShiftCalendar(shifts)
+    store = ingest.PunchStore() if use_cache else None
+    workers = workers or min(len(paths), os.cpu_count() or 1)
+
+    lock = threading.Lock()
+    def file_log(path):
+        # Log lines from several threads, tagged with their file
+        def emit(msg):
+            if log:
+                with lock:
+                    log(f"[{labels[path]}] {msg}")
+        return emit
+
+    def run(path):
+        file_prof = StageProfiler() if prof is not NULL_PROFILER else NULL_PROFILER
+        return analyze_file(path, col_map, shift_cal, holidays, store=store, source=labels[path],
+                            log=file_log(path), prof=file_prof, cancelled=cancelled), file_prof
+
+    results, failed = {}, {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run, path): path for path in paths}
+        for done, fut in enumerate(as_completed(futures), 1):
+            path = futures[fut]
+            if cancelled and cancelled():
+                for f in futures:
+                    f.cancel()
+                raise engine.Cancelled()
+            try:
+                results[path], file_prof = fut.result()
+                if file_prof is not NULL_PROFILER:
+                    prof.stages.extend(dict(rec, source=path) for rec in file_prof.stages)
+                file_log(path)(f"✅ {len(results[path]['summary_df'])} employees analysed.")
+            except engine.Cancelled:
+                raise
+            except Exception as e:
+                failed[path] = str(e)
+                file_log(path)(f"❌ {e}")
+            if progress: progress(done, len(paths))
+    if not results:
+        raise ValueError("No file could be analysed:\n" + "\n".join(f"{p}: {e}" for p, e in failed.items()))
+    return [results[p] for p in paths if p in results], failed
+
+# =============================================================================
+# COMBINED SUMMARIES
+# =============================================================================
+def combine(results):
+    """
+    One summary, status table and name list over every file, in file order:
+    the summaries stacked with SOURCE_COLUMN added last (Name stays first),
+    the status tables with their employee codes shifted to match. A name
+    found in several files is a different person in each, so in `names`
+    (used by the per-day table and individual reports) it gets its source
+    appended.
+    Returns (summary_df, status_df, names).
+    """
+    offsets = np.cumsum([0] + [len(r["names"]) for r in results])
+    summary_df = pd.concat([r["summary_df"].assign(**{SOURCE_COLUMN: r["source"]}) for r in results],
+                           ignore_index=True)
+    status_df = pd.concat([r["status_df"].assign(emp=r["status_df"]["emp"] + np.int32(off))
+                           for r, off in zip(results, offsets)], ignore_index=True)
+    names = summary_df["Name"].to_numpy(dtype=object, copy=True)
+    clash = pd.Index(names).duplicated(keep=False)
+    names[clash] = [f"{n} ({src})" for n, src in zip(names[clash], summary_df[SOURCE_COLUMN].to_numpy()[clash])]
+    return summary_df, status_df, names
+
+def file_totals(results):
+    # One row per file: employee count and the summary columns summed
+    stats = engine.STAT_COLUMNS + [engine.WORKED_COLUMN]
+    rows = [{SOURCE_COLUMN: r["source"], "Employees": len(r["summary_df"]), **r["summary_df"][stats].sum().to_dict()}
+            for r in results]
+    return pd.DataFrame(rows, columns=[SOURCE_COLUMN, "Employees"] + stats).round({engine.WORKED_COLUMN: 2})
+
+def write_workbook(path, results, summary_df=None):
+    """Combined summary, per-file totals and one sheet per file's summary in a single workbook."""
+    summary_df = combine(results)[0] if summary_df is None else summary_df
+    with pd.ExcelWriter(path) as xl:
+        summary_df.to_excel(xl, sheet_name="Combined", index=False)
+        file_totals(results).to_excel(xl, sheet_name="By File", index=False)
+        # Excel sheet names: at most 31 characters, none of []:*?/\\, unique ignoring case
+        sheets = unique_labels([re.sub(r"[\[\]:*?/\\]", "_", r["source"]) for r in results], limit=31,
+                               taken=("Combined", "By File"))
+        for sheet, r in zip(sheets, results):
+            r["summary_df"].to_excel(xl, sheet_name=sheet, index=False)
+    return path
@@ -0,0 +1,230 @@
+"""
+Benchmark suite for the analysis pipeline on synthetic punch logs: time
+parsing, the AnalysisWorker run (what "Run Analysis" does), the detailed
+PDF (export_pdf) and the executive PDF (export_overall_pdf), each timed
+separately, median of several runs. Results go to a JSON file so two runs
+(e.g. before and after a change) can be compared with --compare.
+
+    python bench.py [--employees 500] [--days 90] [--runs 3] [--json bench_results.json]
+    python bench.py --compare bench_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, time as dtime
+
+import matplotlib
+matplotlib.use("Agg")  # no display needed for the executive report
+
+import numpy as np
+import pandas as pd
+
+import engine
+import gui
+import reports
+
+COL_MAP = {"name": "Name", "date": "Date", "in": "Clock In", "out": "Clock Out"}
+
+# How a clock time can appear in a real export, keyed by the --formats names
+TIME_FORMATS = {
+    "24h": lambda h, m: f"{h:02d}:{m:02d}",
+    "24h-sec": lambda h, m: f"{h:02d}:{m:02d}:00",
+    "12h": lambda h, m: f"{(h % 12) or 12:02d}:{m:02d} {'AM' if h < 12 else 'PM'}",
+    "excel": lambda h, m: (h * 60 + m) / 1440.0,
+    "datetime": lambda h, m: f"2024-01-01 {h:02d}:{m:02d}:00",
+    "time": lambda h, m: dtime(h, m),
+}
+
+# =============================================================================
+# SYNTHETIC PUNCH LOGS
+# =============================================================================
+# Hours a night shift period is moved by: 08:00-16:00 becomes 22:00-06:00
+NIGHT_OFFSET_H = 14
+
+def synth_shifts(days, n_shifts, start="2024-01-01", night=False):
+    """
+    `n_shifts` back-to-back periods covering `days` days, each with its own
+    times; with night=True the last one runs 22:00-06:00, across midnight.
+    """
+    edges = np.linspace(0, days, n_shifts + 1).astype(int)
+    first = pd.Timestamp(start)
+    shifts = []
+    for k in range(n_shifts):
+        cin = dtime(8 + k % 2, 30 * (k % 3 == 1))
+        shifts.append({
+            "start": first + pd.Timedelta(days=int(edges[k])),
+            "end": first + pd.Timedelta(days=int(edges[k + 1]) - 1),
+            "cin": cin,
+            "cout": dtime(cin.hour + 8, cin.minute),
+            "friout": dtime(cin.hour + 4, cin.minute),
+        })
+    if night:
+        shifts[-1].update(cin=dtime(22), cout=dtime(6), friout=dtime(2))
+    return shifts
+
+def synth_punches(employees=500, days=90, formats=tuple(TIME_FORMATS), missing=0.05, n_shifts=2,
+                  holidays=2, seed=0, start="2024-01-01", night=False):
+    """
+    Synthetic punch log shaped like a device export: one row per employee
+    and day (a few absent days and duplicate rows), clock times drawn from
+    `formats` at random, each punch blank with probability `missing`. With
+    night=True punches in the last shift period move to around 22:00-06:00
+    (see synth_shifts).
+    Returns (raw_df, shifts, holidays, col_map), ready for AnalysisWorker.
+    """
+    rng = np.random.default_rng(seed)
+    n = employees * days
+    emp = np.repeat(np.arange(employees), days)
+    day = np.tile(np.arange(days), employees)
+    keep = rng.random(n) > 0.05  # days off without any record
+    emp, day = emp[keep], day[keep]
+    n = len(emp)
+
+    in_min = 8 * 60 + rng.integers(-20, 60, n)
+    out_min = 16 * 60 + rng.integers(-90, 120, n)
+    shifts = synth_shifts(days, n_shifts, start, night)
+    if night:
+        late_period = day >= (shifts[-1]["start"] - pd.Timestamp(start)).days
+        # Wider spread than the day shifts, so some ins fall after midnight and some outs before it
+        in_min = np.where(late_period, (in_min + NIGHT_OFFSET_H * 60 + rng.integers(0, 150, n)) % 1440, in_min)
+        out_min = np.where(late_period, (out_min + NIGHT_OFFSET_H * 60 - rng.integers(0, 360, n)) % 1440, out_min)
+    fmt = rng.integers(0, len(formats), n)
+    makers = [TIME_FORMATS[f] for f in formats]
+    def clock(minutes, blank):
+        return [None if b else makers[f](int(m) // 60, int(m) % 60) for m, f, b in zip(minutes, fmt, blank)]
+
+    dates = pd.Timestamp(start) + pd.to_timedelta(day, unit="D")
+    raw_df = pd.DataFrame({
+        "Name": np.char.add("Emp ", emp.astype(str)),
+        "Date": dates.strftime("%d/%m/%Y"),
+        "Clock In": clock(in_min, rng.random(n) < missing),
+        "Clock Out": clock(out_min, rng.random(n) < missing),
+    })
+    dupes = raw_df.sample(frac=0.01, random_state=seed)
+    raw_df = pd.concat([raw_df, dupes]).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+    rnd = random.Random(seed)
+    holiday_set = {pd.Timestamp(start) + pd.Timedelta(days=d) for d in rnd.sample(range(days), min(holidays, days))}
+    return raw_df, shifts, holiday_set, dict(COL_MAP)
+
+# =============================================================================
+# BENCHMARKS
+# =============================================================================
+def timed(fn, runs):
+    """(median seconds, every run's seconds, last return value)"""
+    times, result = [], None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times), times, result
+
+def run_worker(raw_df, shifts, holidays, col_map, vectorized=True):
+    # AnalysisWorker.execute() called in this thread: the same work as a GUI run, no event loop needed
+    worker = gui.AnalysisWorker(raw_df, shifts, holidays, col_map, vectorized=vectorized)
+    summary_df, context = worker.execute()
+    return context
+
+def run_suite(raw_df, shifts, holidays, col_map, runs=3, pdf=True, loop=False, log=print):
+    rows = len(raw_df)
+    results = {}
+    def record(name, fn, n=runs, per=rows):
+        median, times, value = timed(fn, n)
+        results[name] = {"median_s": median, "runs_s": times, "rows_per_s": per / median if median else None}
+        log(f"⏱️ {name:<18} {median * 1000:10.1f} ms  ({per / median:,.0f} rows/s)" if median else f"⏱️ {name}")
+        return value
+
+    def parse_cold():
+        engine.PUNCH_CACHE.clear()
+        return engine.clean_punches(raw_df, col_map)
+    record("parse_cold", parse_cold)
+    record("parse_warm", lambda: engine.clean_punches(raw_df, col_map))
+
+    engine.PUNCH_CACHE.clear()
+    context = record("analysis", lambda: run_worker(raw_df, shifts, holidays, col_map))
+    if loop:
+        loop_context = record("analysis_loop", lambda: run_worker(raw_df, shifts, holidays, col_map,
+                                                                  vectorized=False), n=1)
+        results["analysis_loop"]["matches"] = loop_matches(context, loop_context, log)
+
+    if pdf:
+        days = len(context["status_df"])
+        args = (context["names"], context["status_df"], context["min_date"], context["max_date"])
+        with tempfile.TemporaryDirectory() as tmp:
+            record("export_pdf", lambda: reports.build_detailed_pdf(os.path.join(tmp, "detailed.pdf"), *args),
+                   per=days)
+            record("export_overall_pdf",
+                   lambda: reports.build_executive_pdf(os.path.join(tmp, "executive.pdf"), context["summary_df"]),
+                   per=len(context["summary_df"]))
+    return results
+
+def loop_matches(context, loop_context, log=print):
+    # The reference loop and the vectorized engine must agree on every count and on Worked Hours
+    diff = [c for c in context["summary_df"].columns
+            if not context["summary_df"][c].reset_index(drop=True).equals(loop_context["summary_df"][c])]
+    log("✅ Reference loop matches the vectorized analysis." if not diff else
+        f"❌ Reference loop differs from the vectorized analysis in: {', '.join(diff)}")
+    return not diff
+
+def compare(old, new, log=print):
+    # Median time ratio per benchmark present in both runs (< 1 = faster now)
+    for name, res in new["results"].items():
+        if name in old.get("results", {}):
+            before, after = old["results"][name]["median_s"], res["median_s"]
+            log(f"   {name:<18} {before * 1000:10.1f} ms -> {after * 1000:10.1f} ms  (x{after / before:.2f})")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark parsing, analysis and PDF exports on synthetic data.")
+    parser.add_argument("--employees", type=int, default=500)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--formats", default=",".join(TIME_FORMATS),
+                        help=f"Comma-separated clock formats to mix ({', '.join(TIME_FORMATS)})")
+    parser.add_argument("--missing", type=float, default=0.05, help="Probability a punch is blank")
+    parser.add_argument("--shifts", type=int, default=2, help="Number of shift periods")
+    parser.add_argument("--night", action="store_true", help="Make the last shift period 22:00-06:00")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--no-pdf", action="store_true", help="Skip the PDF exports")
+    parser.add_argument("--loop", action="store_true", help="Also time the per-day reference loop (slow)")
+    parser.add_argument("--json", default="bench_results.json", help="Where to write the results")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in TIME_FORMATS]
+    if unknown or not formats:
+        parser.error(f"unknown format(s): {', '.join(unknown) or '(none)'}")
+    config = {"employees": args.employees, "days": args.days, "formats": formats, "missing": args.missing,
+              "shifts": args.shifts, "night": args.night, "seed": args.seed, "runs": args.runs}
+    raw_df, shifts, holidays, col_map = synth_punches(args.employees, args.days, formats, args.missing,
+                                                      args.shifts, seed=args.seed, night=args.night)
+    print(f"🧪 {len(raw_df):,} punch rows: {args.employees} employees x {args.days} days, "
+          f"{args.shifts} shift periods, formats {', '.join(formats)}")
+    results = run_suite(raw_df, shifts, holidays, col_map, runs=args.runs, pdf=not args.no_pdf, loop=args.loop)
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versions": {"pandas": pd.__version__, "numpy": np.__version__},
+        "config": dict(config, rows=len(raw_df)),
+        "results": results,
+    }
+    if args.compare:
+        with open(args.compare) as fh:
+            print(f"📊 Compared with {args.compare}:")
+            compare(json.load(fh), report)
+    with open(args.json, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"✅ Results saved: {args.json}")
+    return 0 if results.get("analysis_loop", {}).get("matches", True) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
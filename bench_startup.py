@@ -0,0 +1,61 @@
+"""
+Startup benchmark for the GUI: time from a fresh interpreter to the main
+window shown (import gui, build AttendanceApp, first paint), median of
+several runs. Fails when over STARTUP_TARGET_S, or when pandas, ReportLab
+or matplotlib were imported before the window appeared.
+
+    python bench_startup.py [--runs 5] [--target 0.5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+STARTUP_TARGET_S = 0.5
+HEAVY_MODULES = ("pandas", "numpy", "reportlab", "matplotlib", "pyarrow")
+
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import gui
+t_import = time.perf_counter() - t0
+from PySide6.QtWidgets import QApplication
+app = QApplication([])
+window = gui.AttendanceApp()
+heavy = [m for m in HEAVY if m in sys.modules]
+window.show()
+app.processEvents()
+print(json.dumps({"import": t_import, "window": time.perf_counter() - t0, "heavy": heavy}))
+"""
+
+def probe():
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    code = f"HEAVY = {HEAVY_MODULES!r}\n" + PROBE
+    out = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                         env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure GUI startup time.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target", type=float, default=STARTUP_TARGET_S, help="Seconds to window shown")
+    args = parser.parse_args(argv)
+
+    probe()  # warm the OS file cache and __pycache__
+    results = [probe() for _ in range(args.runs)]
+    t_import = statistics.median(r["import"] for r in results)
+    t_window = statistics.median(r["window"] for r in results)
+    heavy = sorted({m for r in results for m in r["heavy"]})
+
+    print(f"⏱️ import gui: {t_import * 1000:.0f} ms | window shown: {t_window * 1000:.0f} ms "
+          f"(target {args.target * 1000:.0f} ms, median of {args.runs})")
+    ok = t_window <= args.target and not heavy
+    if heavy:
+        print(f"❌ Imported before the window appeared: {', '.join(heavy)}")
+    print("✅ Startup within target" if ok else "❌ Startup over target")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Headless attendance analysis (no Qt, no prompts), e.g. for a nightly job:
+
+    python cli.py punches.xlsx rules.toml -o reports/
+    python cli.py branches/ extra.xlsx rules.toml -o reports/   # batch
+
+The rules file (TOML or JSON, see rules.example.toml) holds the column
+mapping, holidays and shift periods entered on the GUI's Import and Rules
+tabs. Writes the summary workbook plus the individual and executive PDFs.
+Given several files or a folder, every file is analysed (concurrently) and
+gets its own subfolder of reports, next to a combined workbook and
+executive report.
+"""
+import argparse
+import json
+import os
+import sys
+import tomllib
+
+import matplotlib
+matplotlib.use("Agg")  # no display on a server
+
+import pandas as pd
+
+import batch
+import engine
+import ingest
+import reports
+from profiler import StageProfiler
+
+COLUMN_ROLES = ("name", "date", "in", "out")
+
+# =============================================================================
+# RULES FILE
+# =============================================================================
+def _rule_time(shift, key):
+    value = shift.get(key)
+    t = engine.parse_time(value) if value is not None else None
+    if t is None:
+        raise ValueError(f"Shift {shift.get('start')} to {shift.get('end')}: invalid or missing '{key}' time ({value!r}).")
+    return t
+
+def load_rules(path):
+    """
+    Returns (shifts, holidays, col_map) in the same shape the GUI builds:
+    shift dicts with start/end Timestamps and cin/cout/friout times.
+    """
+    with open(path, "rb") as fh:
+        rules = tomllib.load(fh) if path.lower().endswith(".toml") else json.load(fh)
+
+    col_map = dict(rules.get("columns", {}))
+    if col_map.get("swipes"):
+        # Raw swipe log: one timestamp (or date plus time) per row, no out column
+        col_map.setdefault("in", col_map.get("date"))
+        col_map["out"] = col_map.get("in")
+    missing = [role for role in COLUMN_ROLES if not col_map.get(role)]
+    if missing:
+        raise ValueError(f"Rules file: no column mapped for {', '.join(missing)}.")
+
+    shifts = []
+    for s in rules.get("shifts", []):
+        shifts.append({
+            "start": pd.to_datetime(s["start"]),
+            "end": pd.to_datetime(s["end"]),
+            "cin": _rule_time(s, "in"),
+            "cout": _rule_time(s, "out"),
+            "friout": _rule_time(s, "friday_out") if "friday_out" in s else _rule_time(s, "out"),
+        })
+    holidays = {pd.to_datetime(d) for d in rules.get("holidays", [])}
+    mapping = {role: col_map[role] for role in COLUMN_ROLES}
+    if col_map.get("swipes"):
+        mapping["swipes"] = True
+    return shifts, holidays, mapping
+
+# =============================================================================
+# PIPELINE
+# =============================================================================
+def run(path, rules_path, out_dir, detailed="single", use_cache=True, log=print, trace_path=None, workers=1,
+        chart_format="png"):
+    shifts, holidays, col_map = load_rules(rules_path)
+    shift_cal = engine.ShiftCalendar(shifts)
+    prof = StageProfiler(log=log)
+
+    store = ingest.PunchStore()
+    file_key = store.file_key(path) if use_cache and store.enabled else None
+    log(f"📂 {path}")
+    df = ingest.load_window(col_map, shift_cal.start, shift_cal.end, path=path,
+                            store=store, file_key=file_key, log=log, shift_cal=shift_cal, prof=prof)
+    emp_index = engine.EmployeeIndex(df, col_map['name'], col_map['date'])
+    log(f"👤 Found {len(emp_index)} unique employees.")
+    summary_df, status_df = engine.analyze(df, shift_cal, holidays, engine.punch_columns(col_map),
+                                           log=log, emp_index=emp_index, workers=workers, prof=prof)
+
+    write_reports(out_dir, summary_df, status_df, emp_index.names, shift_cal, detailed, prof, log, chart_format)
+    if trace_path:
+        log(f"✅ Stage trace saved: {prof.dump(trace_path, source=path)}")
+    return summary_df
+
+def write_reports(out_dir, summary_df, status_df, names, shift_cal, detailed, prof, log, chart_format="png"):
+    os.makedirs(out_dir, exist_ok=True)
+    xlsx = os.path.join(out_dir, "attendance_summary.xlsx")
+    summary_df.to_excel(xlsx, index=False)
+    log(f"✅ Summary Saved: {xlsx}")
+
+    args = (names, status_df, shift_cal.start, shift_cal.end)
+    if detailed == "per-employee":
+        folder = os.path.join(out_dir, "individual")
+        with prof.stage("PDF build", rows=len(status_df)):
+            files = reports.build_detailed_pdf_parallel(folder, *args, per_employee=True)
+        log(f"✅ {len(files)} Individual PDFs Saved to: {folder}")
+    else:
+        pdf = os.path.join(out_dir, "attendance_detailed.pdf")
+        if detailed == "parallel":
+            with prof.stage("PDF build", rows=len(status_df)):
+                reports.build_detailed_pdf_parallel(pdf, *args)
+        else:
+            reports.build_detailed_pdf(pdf, *args, prof=prof)
+        log(f"✅ Detailed PDF Saved: {pdf}")
+
+    pdf = os.path.join(out_dir, "attendance_executive_summary.pdf")
+    reports.build_executive_pdf(pdf, summary_df, prof=prof, chart_format=chart_format, log=log)
+    log(f"✅ Executive Report Saved: {pdf}")
+
+def run_batch(sources, rules_path, out_dir, detailed="single", use_cache=True, log=print, trace_path=None,
+              jobs=None, chart_format="png"):
+    """Every punch file in `sources` analysed on `jobs` threads; reports per file and combined."""
+    shifts, holidays, col_map = load_rules(rules_path)
+    shift_cal = engine.ShiftCalendar(shifts)
+    prof = StageProfiler(log=log)
+    results, failed = batch.analyze_batch(sources, col_map, shift_cal, holidays, workers=jobs, use_cache=use_cache,
+                                          log=log, prof=prof)
+    log(f"📂 Analysed {len(results)} files" + (f", {len(failed)} failed" if failed else "") + ".")
+    for r in results:
+        write_reports(os.path.join(out_dir, r["source"]), r["summary_df"], r["status_df"], r["names"],
+                      shift_cal, detailed, prof, log, chart_format)
+
+    summary_df = batch.combine(results)[0]
+    xlsx = batch.write_workbook(os.path.join(out_dir, "attendance_summary_combined.xlsx"), results, summary_df)
+    log(f"✅ Combined Summary Saved: {xlsx}")
+    pdf = os.path.join(out_dir, "attendance_executive_summary_combined.pdf")
+    reports.build_executive_pdf(pdf, summary_df, prof=prof, chart_format=chart_format, log=log)
+    log(f"✅ Combined Executive Report Saved: {pdf}")
+    if trace_path:
+        log(f"✅ Stage trace saved: {prof.dump(trace_path, sources=list(sources))}")
+    return summary_df, failed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the attendance analysis without the GUI.")
+    parser.add_argument("punches", nargs="+",
+                        help="Punch log (.xlsx, .xls or .csv); several files or folders for a batch run")
+    parser.add_argument("rules", help="Rules file (.toml or .json): columns, holidays, shifts")
+    parser.add_argument("-o", "--out", default=".", help="Output folder (default: current folder)")
+    parser.add_argument("--detailed", choices=["single", "parallel", "per-employee"], default="single",
+                        help="Individual report: one file, one file rendered in parallel, or one PDF per employee")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the parsed-punch cache")
+    parser.add_argument("--trace", metavar="JSON", help="Write per-stage timings and peak memory to this file")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes to split a large analysis across by employee (default: 1)")
+    parser.add_argument("--vector-charts", action="store_true",
+                        help="Embed executive charts as SVG instead of PNG (needs svglib)")
+    parser.add_argument("--jobs", type=int, help="Batch runs: files analysed at once (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    chart_format = "svg" if args.vector_charts else "png"
+    try:
+        if len(args.punches) > 1 or os.path.isdir(args.punches[0]):
+            _, failed = run_batch(args.punches, args.rules, args.out, detailed=args.detailed,
+                                  use_cache=not args.no_cache, trace_path=args.trace, jobs=args.jobs,
+                                  chart_format=chart_format)
+            for path, error in failed.items():
+                print(f"❌ {path}: {error}", file=sys.stderr)
+            return 1 if failed else 0
+        run(args.punches[0], args.rules, args.out, detailed=args.detailed, use_cache=not args.no_cache,
+            trace_path=args.trace, workers=max(1, args.workers), chart_format=chart_format)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
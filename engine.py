@@ -0,0 +1,844 @@
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+from profiler import NULL_PROFILER
+
+# Summary columns, in the order the GUI and exporters expect them
+STAT_COLUMNS = ["Present", "Lates", "Early", "Absents", "Suspicious", "No Out"]
+# Total hours between in and out per employee, after the status counts
+WORKED_COLUMN = "Worked Hours"
+# One bit per summary column in the per-day status table's flag mask
+STATUS_BITS = {col: 1 << i for i, col in enumerate(STAT_COLUMNS)}
+
+class Cancelled(Exception):
+    """Raised by long loops when the caller's `cancelled()` callback returns True."""
+
+# =============================================================================
+# TIME PARSING: SHARED CACHE
+# =============================================================================
+TIME_FORMATS = ["%I:%M:%S %p", "%I:%M %p", "%H:%M:%S", "%H:%M", "%Y-%m-%d %H:%M:%S"]
+MISSING_TOKENS = ['', 'nan', 'nat', 'none']
+SECONDS_PER_DAY = 86400
+# Serials outside this range overflow datetime(1899, 12, 30) + timedelta
+EXCEL_SERIAL_RANGE = (-693593, 2958465)
+# Cached result for a non-empty cell that matched no format
+UNPARSEABLE = -1.0
+
+class ParseCache:
+    """
+    Bounded map from raw clock cell to seconds since midnight (NaN = empty,
+    UNPARSEABLE = no format matched). Punch exports repeat a few hundred
+    distinct strings, so after warm-up almost every lookup is a hit.
+    """
+    def __init__(self, maxsize=100_000):
+        self.maxsize = maxsize
+        self._store = {}
+        self._lock = threading.Lock()  # analysis, exports and batch files share the cache across threads
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, value):
+        try:
+            result = self._store.get(value)
+        except TypeError:  # unhashable cell
+            result = None
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put(self, value, seconds):
+        if isinstance(value, str):
+            value = sys.intern(value)
+        with self._lock:
+            if len(self._store) >= self.maxsize:
+                # Evict the oldest entry (dicts keep insertion order)
+                del self._store[next(iter(self._store))]
+            try:
+                self._store[value] = seconds
+            except TypeError:
+                pass
+
+    def clear(self):
+        self._store.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._store)
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0
+        return f"{self.hits} hits / {self.misses} misses ({rate:.0f}% hit rate, {len(self)} entries)"
+
+# Every parse entry point (GUI worker, exporters, main.py) shares this one
+PUNCH_CACHE = ParseCache()
+
+# =============================================================================
+# TIME PARSING (single cell)
+# =============================================================================
+def _parse_time_uncached(value):
+    if pd.isna(value) or value == "" or str(value).strip().lower() in MISSING_TOKENS:
+        return None
+    if isinstance(value, (pd.Timedelta, np.timedelta64)):  # already parsed (see clean_punches)
+        return seconds_to_time(pd.Timedelta(value).total_seconds())
+    if isinstance(value, (float, int)):
+        try:
+            return (datetime(1899, 12, 30) + timedelta(days=float(value))).time()
+        except:
+            pass
+    value = str(value).strip()
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+    return None
+
+def parse_time(value, cache=PUNCH_CACHE):
+    """
+    Parses a clock cell (Excel float, 12h/24h string or full timestamp)
+    into a datetime.time. Returns None if parsing fails.
+    """
+    if pd.isna(value):
+        # Not cached: NaN never equals itself, so every blank cell would add an entry
+        return None
+    seconds = cache.get(value)
+    if seconds is None:
+        t = _parse_time_uncached(value)
+        if t is not None:
+            seconds = time_to_seconds(t)
+        elif pd.isna(value) or str(value).strip().lower() in MISSING_TOKENS:
+            seconds = np.nan
+        else:
+            seconds = UNPARSEABLE
+        cache.put(value, seconds)
+    return None if seconds == UNPARSEABLE else seconds_to_time(seconds)
+
+def time_to_seconds(t):
+    return t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1e6
+
+def seconds_to_time(sec):
+    if np.isnan(sec): return None
+    micros = int(round(sec * 1e6))
+    return (datetime.min + timedelta(microseconds=micros)).time()
+
+# =============================================================================
+# TIME PARSING (whole column)
+# =============================================================================
+def _parse_uniques(uniques):
+    # Vectorized parse of distinct, non-null cells -> (seconds, unparseable mask)
+    secs = np.full(len(uniques), np.nan)
+    bad = np.zeros(len(uniques), dtype=bool)
+
+    # 1. Excel float / int serials
+    is_num = np.fromiter((isinstance(v, (float, int)) for v in uniques), dtype=bool, count=len(uniques))
+    nums = uniques[is_num].astype(float)
+    with np.errstate(invalid='ignore'):
+        in_range = (nums > EXCEL_SERIAL_RANGE[0]) & (nums < EXCEL_SERIAL_RANGE[1])
+    micros = np.round(np.where(in_range, nums, 0) * SECONDS_PER_DAY * 1e6) % (SECONDS_PER_DAY * 1e6)
+    secs[is_num] = np.where(in_range, micros / 1e6, np.nan)
+    # Non-finite or overflowing serials fall through to the string formats, as before
+    pending = ~is_num
+    pending[np.flatnonzero(is_num)[~in_range & ~np.isnan(nums)]] = True
+
+    # 2. Strings (and anything else, via str()), grouped by format
+    text = pd.Series(uniques[pending], dtype=object).astype(str).str.strip()
+    missing = text.str.lower().isin(MISSING_TOKENS).to_numpy()
+    idx = np.flatnonzero(pending)[~missing]
+    text = text[~missing]
+    for fmt in TIME_FORMATS:
+        if text.empty: break
+        parsed = pd.to_datetime(text, format=fmt, errors='coerce')
+        ok = parsed.notna().to_numpy()
+        if "%S" in fmt:
+            # strptime rejects leap seconds, pandas silently rolls them over
+            ok = ok & ~text.str.contains(r":6[01](?:\s|$)").to_numpy()
+        tod = parsed[ok] - parsed[ok].dt.normalize()
+        secs[idx[ok]] = tod.dt.total_seconds().to_numpy()
+        idx, text = idx[~ok], text[~ok]
+    bad[idx] = True
+    return secs, bad
+
+def parse_time_column(series, cache=PUNCH_CACHE):
+    """
+    Parses a whole clock column in one pass. Each distinct value is looked up
+    in the cache; the misses are parsed together (Excel serials
+    arithmetically, strings by trying every format on the still-unparsed
+    group at once). Returns (seconds since midnight as float, NaN where
+    missing or unparseable; boolean mask of unparseable cells).
+    A timedelta64 column is already parsed and is converted directly.
+    """
+    series = pd.Series(series)
+    if pd.api.types.is_timedelta64_dtype(series):
+        return series.dt.total_seconds().to_numpy(dtype=float), np.zeros(len(series), dtype=bool)
+
+    codes, uniques = pd.factorize(pd.Series(series, dtype=object), use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+    cached = [cache.get(v) for v in uniques]
+    miss = np.fromiter((c is None for c in cached), dtype=bool, count=len(uniques))
+    secs = np.array([np.nan if c is None else c for c in cached], dtype=float)
+
+    if miss.any():
+        new_secs, new_bad = _parse_uniques(uniques[miss])
+        new_secs[new_bad] = UNPARSEABLE
+        for value, sec in zip(uniques[miss], new_secs):
+            cache.put(value, sec)
+        secs[miss] = new_secs
+
+    bad = secs == UNPARSEABLE
+    secs[bad] = np.nan
+
+    # Broadcast back onto the column (sentinel -1 lands on the trailing slot)
+    secs = np.append(secs, np.nan)
+    bad = np.append(bad, False)
+    return secs[codes], bad[codes]
+
+# =============================================================================
+# DATA PREPARATION
+# =============================================================================
+def mapped_columns(col_map):
+    # Name, date, in, out, without repeats if two roles share a column
+    return list(dict.fromkeys(col_map[k] for k in ('name', 'date', 'in', 'out')))
+
+def clean_punches(raw_df, col_map, log=None, prof=NULL_PROFILER):
+    """
+    Typed punch frame: the mapped columns only, dates parsed (unparseable
+    rows dropped), names categorical and both clock columns parsed to
+    time-of-day timedelta64 (NaT = missing or unparseable). Swipe logs go
+    through clean_swipes instead.
+    """
+    if col_map.get('swipes'):
+        return clean_swipes(raw_df, col_map, log, prof)
+    df = raw_df[mapped_columns(col_map)].copy()
+    c_date = col_map['date']
+    with prof.stage("date parse", rows=len(df)):
+        df[c_date] = pd.to_datetime(df[c_date], errors='coerce', dayfirst=True)
+        df = df.dropna(subset=[c_date])
+    with prof.stage("time parse", rows=len(df)):
+        for col in dict.fromkeys((col_map['in'], col_map['out'])):
+            secs, bad = parse_time_column(df[col])
+            if log and bad.any():
+                samples = ", ".join(map(str, pd.unique(df[col][bad])[:5]))
+                log(f"⚠️ {bad.sum()} unparseable values in '{col}' (e.g. {samples})")
+            df[col] = pd.to_timedelta(secs, unit='s')
+        df[col_map['name']] = df[col_map['name']].astype('category')
+    return df
+
+# Per-day columns a raw swipe log is reduced to (see normalize_swipes)
+SWIPE_COLUMNS = {"in": "First In", "out": "Last Out"}
+
+def punch_columns(col_map):
+    """Column map of the per-day punch frame the analysis reads."""
+    if col_map.get('swipes'):
+        return {"name": col_map['name'], "date": col_map['date'], **SWIPE_COLUMNS}
+    return col_map
+
+def clean_swipes(raw_df, col_map, log=None, prof=NULL_PROFILER):
+    """
+    Typed swipe log (col_map['swipes']): one row per device swipe with the
+    name categorical and a full timestamp in the date column. The date
+    column may hold the timestamp itself (col_map['in'] names the same
+    column) or just the date, with the swipe time in col_map['in'].
+    Rows without a usable timestamp are dropped.
+    """
+    c_name, c_date, c_time = col_map['name'], col_map['date'], col_map['in']
+    with prof.stage("date parse", rows=len(raw_df)):
+        stamps = pd.to_datetime(raw_df[c_date], errors='coerce', dayfirst=True)
+    if c_time != c_date:
+        with prof.stage("time parse", rows=len(raw_df)):
+            secs, bad = parse_time_column(raw_df[c_time])
+            if log and bad.any():
+                samples = ", ".join(map(str, pd.unique(raw_df[c_time][bad])[:5]))
+                log(f"⚠️ {bad.sum()} unparseable values in '{c_time}' (e.g. {samples})")
+            stamps = stamps.dt.normalize() + pd.to_timedelta(secs, unit='s')
+    df = pd.DataFrame({c_name: raw_df[c_name], c_date: stamps}).dropna(subset=[c_date])
+    df[c_name] = df[c_name].astype('category')
+    return df
+
+def normalize_swipes(df, col_map, shift_cal=None):
+    """
+    Reduces a clean_swipes frame to one row per employee-day with one
+    groupby: first swipe as First In, last as Last Out (none when the day
+    has a single swipe), Worked (last - first) and the swipe count. Times
+    are measured from the workday's midnight: with a ShiftCalendar, swipes
+    before the previous day's overnight cutover close that day's shift and
+    come out past 24h. Rows follow the order each employee-day first appears
+    in the log.
+    """
+    c_name, c_date = col_map['name'], col_map['date']
+    day = df[c_date].dt.normalize()
+    secs = (df[c_date] - day).dt.total_seconds().to_numpy()
+    if shift_cal is not None and len(df):
+        prev_day = day - pd.Timedelta(days=1)
+        with np.errstate(invalid='ignore'):
+            back = secs < shift_cal.cutover(prev_day)
+        day = day.mask(back, prev_day)
+        secs = np.where(back, secs + SECONDS_PER_DAY, secs)
+
+    swipes = pd.DataFrame({c_name: df[c_name], c_date: day, "secs": secs})
+    agg = swipes.groupby([c_name, c_date], sort=False, observed=True)["secs"].agg(["min", "max", "size"])
+    agg = agg.reset_index()
+    first = agg["min"].to_numpy()
+    last = np.where(agg["size"].to_numpy() > 1, agg["max"].to_numpy(), np.nan)
+    return pd.DataFrame({
+        c_name: agg[c_name],
+        c_date: agg[c_date],
+        SWIPE_COLUMNS["in"]: pd.to_timedelta(first, unit='s'),
+        SWIPE_COLUMNS["out"]: pd.to_timedelta(last, unit='s'),
+        "Worked": pd.to_timedelta(last - first, unit='s'),
+        "Swipes": agg["size"].to_numpy(),
+    })
+
+def filter_window(df, c_date, min_date, max_date):
+    return df[(df[c_date] >= min_date) & (df[c_date] <= max_date)]
+
+class EmployeeIndex:
+    """
+    Cleaned punches sorted by (employee, date) with one offset per employee,
+    built once so every consumer slices an employee's rows in O(1) instead of
+    scanning the whole frame with df[df[name] == name].
+    Employees keep their order of first appearance; rows without a name are
+    left out, as they never matched an employee before.
+    """
+    def __init__(self, df, c_name, c_date):
+        codes, names = pd.factorize(df[c_name], use_na_sentinel=True)
+        valid = codes >= 0
+        # Stable sort keeps the original order of duplicate (name, date) rows
+        order = np.flatnonzero(valid)[np.lexsort((df[c_date].to_numpy()[valid], codes[valid]))]
+        self.frame = df.iloc[order]
+        self.positions = order  # row positions of self.frame in df
+        self.codes = codes[order].astype(np.int32)  # into self.names
+        self.names = np.asarray(names, dtype=object)
+        self.offsets = np.searchsorted(self.codes, np.arange(len(self.names) + 1))
+        self._pos = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        for i, name in enumerate(self.names):
+            yield name, self.rows(i)
+
+    def rows(self, i):
+        return self.frame.iloc[self.offsets[i]:self.offsets[i + 1]]
+
+    def get(self, name):
+        i = self._pos.get(name)
+        return self.frame.iloc[0:0] if i is None else self.rows(i)
+
+# =============================================================================
+# SHIFT CALENDAR
+# =============================================================================
+def find_overlaps(shifts):
+    """Pairs of shift indices whose (inclusive) date ranges overlap."""
+    return [(i, j) for i in range(len(shifts)) for j in range(i + 1, len(shifts))
+            if shifts[i]['start'] <= shifts[j]['end'] and shifts[j]['start'] <= shifts[i]['end']]
+
+def _as_datetime64(values):
+    return np.asarray(pd.DatetimeIndex(values), dtype='datetime64[ns]')
+
+class ShiftCalendar:
+    """
+    Date -> shift resolver built once from the shift periods. Periods are
+    sorted by start so a whole date range resolves with one searchsorted;
+    overlapping periods are rejected up front instead of the first match
+    silently winning.
+    """
+    def __init__(self, shifts):
+        if not shifts:
+            raise ValueError("No shift periods configured.")
+        overlaps = find_overlaps(shifts)
+        if overlaps:
+            pairs = ", ".join(f"#{i + 1} & #{j + 1}" for i, j in overlaps)
+            raise ValueError(f"Overlapping shift periods: {pairs}")
+        self.shifts = list(shifts)
+        starts = _as_datetime64([s['start'] for s in shifts])
+        ends = _as_datetime64([s['end'] for s in shifts])
+        self._order = np.argsort(starts, kind='stable')
+        self._starts = starts[self._order]
+        self._ends = ends[self._order]
+        self.start = pd.Timestamp(self._starts[0])
+        self.end = pd.Timestamp(ends.max())
+        self._req_in = np.array([time_to_seconds(s['cin']) for s in shifts])
+        self._req_out = np.array([time_to_seconds(s['cout']) for s in shifts])
+        self._req_fri = np.array([time_to_seconds(s['friout']) for s in shifts])
+
+    def resolve(self, dates):
+        # Index into self.shifts for every date, -1 where no period covers it
+        values = _as_datetime64(dates)
+        pos = np.searchsorted(self._starts, values, side='right') - 1
+        clipped = np.maximum(pos, 0)
+        covered = (pos >= 0) & (values <= self._ends[clipped])
+        return np.where(covered, self._order[clipped], -1)
+
+    def working_days(self, holidays, start=None, end=None):
+        """
+        Working days in [start, end] (default: the shift window) with their
+        shift and required in/out times in seconds since midnight. Sundays,
+        holidays and days no period covers are dropped.
+        """
+        dates = pd.date_range(start=start or self.start, end=end or self.end)
+        dates = dates[(dates.weekday != 6) & ~dates.isin(list(holidays))]
+        pos = self.resolve(dates)
+        dates, pos = dates[pos >= 0], pos[pos >= 0]
+        req_out = np.where(dates.weekday == 4, self._req_fri[pos], self._req_out[pos])
+        return pd.DataFrame({"date": dates, "shift": pos, "req_in": self._req_in[pos], "req_out": req_out})
+
+    def cutover(self, dates):
+        """overnight_cutover of each date's shift (NaN: same-day shift or no period)."""
+        dates = pd.DatetimeIndex(dates)
+        pos = self.resolve(dates)
+        safe = np.maximum(pos, 0)
+        req_out = np.where(dates.weekday == 4, self._req_fri[safe], self._req_out[safe])
+        return np.where(pos >= 0, overnight_cutover(self._req_in[safe], req_out), np.nan)
+
+    def iter_days(self, holidays, start=None, end=None):
+        days = self.working_days(holidays, start, end)
+        for date, pos in zip(days["date"], days["shift"]):
+            yield date, self.shifts[pos]
+
+# =============================================================================
+# COMPACT ENCODING
+# =============================================================================
+# Data kept for the whole session (PunchGrid, the per-day status table) is
+# stored compactly: employees as int32 codes into a name table, dates as
+# int32 day ordinals (days since 1970-01-01) and clock times as int32 whole
+# seconds since the workday's midnight, MISSING_TIME where there is no punch.
+# The engine functions below take either these or float seconds with NaN:
+# a punch is present where its time is >= 0.
+MISSING_TIME = -1
+
+def encode_times(secs):
+    secs = np.asarray(secs, dtype=float)
+    return np.where(np.isnan(secs), MISSING_TIME, np.round(np.nan_to_num(secs))).astype(np.int32)
+
+def decode_times(times):
+    times = np.asarray(times, dtype=float)
+    return np.where(times >= 0, times, np.nan)
+
+def encode_days(dates):
+    return np.asarray(dates, dtype='datetime64[D]').astype(np.int64).astype(np.int32)
+
+def decode_days(days):
+    return np.asarray(days, dtype=np.int64).astype('datetime64[D]').astype('datetime64[ns]')
+
+# =============================================================================
+# VECTORIZED ENGINE
+# =============================================================================
+def overnight_cutover(req_in, req_out):
+    """
+    For shifts that end past midnight (required out <= in): seconds past
+    midnight halfway through the off-duty gap. Punches earlier than this on
+    the clock belong to the shift that started the day before. NaN for
+    shifts that end the same day.
+    """
+    req_in, req_out = np.asarray(req_in, dtype=float), np.asarray(req_out, dtype=float)
+    return np.where(req_out <= req_in, req_out + (req_in - req_out) / 2, np.nan)
+
+def shift_relative(cin, cout, req_in, req_out):
+    """
+    In/out/required-out as seconds since the workday's midnight: for
+    overnight shifts, punches before the cutover and the required out move
+    to the next day (+24h). Same-day shifts pass through unchanged.
+    """
+    cutover = overnight_cutover(req_in, req_out)
+    night = ~np.isnan(cutover)
+    if not night.any():
+        return cin, cout, req_out
+    with np.errstate(invalid='ignore'):
+        cin = np.where((cin >= 0) & (cin < cutover), cin + SECONDS_PER_DAY, cin)
+        cout = np.where((cout >= 0) & (cout < cutover), cout + SECONDS_PER_DAY, cout)
+    return cin, cout, np.where(night, req_out + SECONDS_PER_DAY, req_out)
+
+def compute_flags(cin, cout, req_in, req_out):
+    """
+    Whole-column equivalent of check_attendance_status. Takes seconds since
+    midnight (NaN or MISSING_TIME = missing punch) and returns a dict of
+    boolean arrays. Overnight shifts are compared across midnight (see
+    shift_relative).
+    """
+    cin, cout, req_out = shift_relative(cin, cout, req_in, req_out)
+    has_in = cin >= 0
+    has_out = cout >= 0
+    late = has_in & (cin > req_in)
+    return {
+        "Absents": ~has_in & ~has_out,
+        "Suspicious": ~has_in & has_out,
+        "Lates": late,
+        "Early": has_in & has_out & (cout < req_out),
+        "No Out": has_in & ~has_out,
+        "Present": has_in & (has_out | late),
+    }
+
+def worked_hours(cin, cout, req_in, req_out):
+    """Hours from in to out (across midnight on overnight shifts); 0 without both punches."""
+    cin, cout, _ = shift_relative(cin, cout, req_in, req_out)
+    return np.clip(np.where((cin >= 0) & (cout >= 0), cout - cin, 0), 0, None) / 3600
+
+def flag_mask(cin, cout, req_in, req_out):
+    mask = np.zeros(np.shape(cin), dtype=np.uint8)
+    for col, flag in compute_flags(cin, cout, req_in, req_out).items():
+        mask |= flag.astype(np.uint8) * np.uint8(STATUS_BITS[col])
+    return mask
+
+def count_flags(mask):
+    # Per-employee counts from an employee x day mask grid, in STAT_COLUMNS order
+    return np.stack([np.count_nonzero(mask & STATUS_BITS[col], axis=1) for col in STAT_COLUMNS], axis=1)
+
+class PunchGrid:
+    """
+    The first punch of every (employee, date) in a cleaned frame, with both
+    clock columns parsed to seconds once, compactly encoded (int32 employee
+    codes, day ordinals and times, see COMPACT ENCODING). Analysis runs only
+    look days up here, so a re-run with other shifts or holidays never
+    re-parses the file. `window` is the date range the frame was cut to
+    (None = whole file).
+    """
+    def __init__(self, df, col_map, window=None, log=None, emp_index=None, prof=NULL_PROFILER):
+        c_date = col_map['date']
+        idx = emp_index if emp_index is not None else EmployeeIndex(df, col_map['name'], c_date)
+        punches, codes = idx.frame, idx.codes
+        dates = punches[c_date].to_numpy()
+        # First record per (name, date) wins, as in the per-day loop; the index
+        # is stably sorted so duplicates sit next to each other
+        first = np.ones(len(punches), dtype=bool)
+        first[1:] = (codes[1:] != codes[:-1]) | (dates[1:] != dates[:-1])
+
+        self.names = idx.names
+        self.codes = codes[first]
+        self.days = encode_days(dates[first])
+        self.positions = idx.positions[first]
+        self.window = window
+        with prof.stage("time parse", rows=len(punches)):
+            for attr, col in (("cin", col_map['in']), ("cout", col_map['out'])):
+                secs, bad = parse_time_column(punches[col])
+                if log and bad.any():
+                    samples = ", ".join(map(str, pd.unique(punches[col][bad])[:5]))
+                    log(f"⚠️ {bad.sum()} unparseable values in '{col}' (e.g. {samples})")
+                setattr(self, attr, encode_times(secs[first]))
+
+    def covers(self, start, end):
+        return self.window is None or (self.window[0] <= start and end <= self.window[1])
+
+    def employees(self, start, end):
+        """Codes of employees punching in [start, end], by first appearance there."""
+        lo, hi = encode_days([start, end])
+        inside = (self.days >= lo) & (self.days <= hi)
+        first_seen = np.full(len(self.names), np.iinfo(np.int64).max)
+        np.minimum.at(first_seen, self.codes[inside], self.positions[inside])
+        seen = np.flatnonzero(first_seen < np.iinfo(np.int64).max)
+        return seen[np.argsort(first_seen[seen], kind='stable')]
+
+    def append(self, other, merge=False):
+        """
+        Grid with `other`'s punches added as if its rows came after this
+        one's in the file: (employee, date) pairs already present keep their
+        first punch and the repeats are dropped; new names are numbered after
+        the existing ones. With merge=True (swipe logs, whose days can span
+        two exports when a night shift crosses midnight) a repeated pair is
+        folded into the existing day instead: earliest in, latest swipe as
+        out. Returns (merged grid, boolean mask of `other`'s pairs that were
+        added, mask of those that changed an existing day).
+        """
+        names = pd.Index(self.names).append(pd.Index(other.names)).unique()
+        other_codes = names.get_indexer(other.names).astype(np.int32)[other.codes]
+        codes = np.concatenate([self.codes, other_codes])
+        days = np.concatenate([self.days, other.days])
+        keys = (codes.astype(np.int64) << 32) + days
+        added = ~np.isin(keys[len(self.codes):], keys[:len(self.codes)])
+
+        cin, cout = self.cin, self.cout
+        changed = np.zeros(len(added), dtype=bool)
+        if merge and not added.all():
+            rep = np.flatnonzero(~added)
+            at = pd.Index(keys[:len(self.codes)]).get_indexer(keys[len(self.codes):][rep])
+            old_in, old_out = cin[at], cout[at]
+            # Every present time of the day: the earliest is the in, the latest the out
+            times = np.stack([old_in, old_out, other.cin[rep], other.cout[rep]])
+            new_in = np.where(times >= 0, times, np.iinfo(np.int32).max).min(axis=0)
+            # (a swipe already on record, e.g. the same export appended twice, adds no out)
+            new_out = np.where(times.max(axis=0) > new_in, times.max(axis=0), old_out)
+            changed[rep] = (new_in != old_in) | (new_out != old_out)
+            cin, cout = cin.copy(), cout.copy()
+            cin[at], cout[at] = new_in, new_out
+
+        merged = PunchGrid.__new__(PunchGrid)
+        merged.names = np.asarray(names, dtype=object)
+        merged.codes = np.concatenate([self.codes, other_codes[added]])
+        merged.days = days[np.concatenate([np.ones(len(self.codes), dtype=bool), added])]
+        offset = int(self.positions.max(initial=-1)) + 1
+        merged.positions = np.concatenate([self.positions, other.positions[added] + offset])
+        merged.cin = np.concatenate([cin, other.cin[added]])
+        merged.cout = np.concatenate([cout, other.cout[added]])
+        merged.window = self.window
+        return merged, added, changed
+
+    def scatter(self, emp_codes, days, cin, cout, columns=None):
+        """Writes punches into employee x day grids (rows follow emp_codes, columns the dates `days`)."""
+        row = np.full(len(self.names), -1)
+        row[emp_codes] = np.arange(len(emp_codes))
+        col = pd.Index(encode_days(days)).get_indexer(self.days)
+        keep = (row[self.codes] >= 0) & (col >= 0)
+        if columns is not None:
+            keep &= columns[np.maximum(col, 0)]
+        r, c = row[self.codes[keep]], col[keep]
+        cin[r, c] = self.cin[keep]
+        cout[r, c] = self.cout[keep]
+
+# =============================================================================
+# PARTITIONED ANALYSIS (PROCESS POOL)
+# =============================================================================
+# Employees never affect each other's flags, so a full run can be split into
+# employee ranges computed on several cores. Arrays cross the process
+# boundary as named shared-memory blocks rather than pickled frames: the
+# workers attach by name and write their rows of the employee x day grids in
+# place; only each range's counts and worked hours come back through the pool.
+# Below this many employees per worker the pool's start-up costs more than it saves
+MIN_PARTITION_EMPLOYEES = 2000
+
+_POOL = {}  # the last pool and its size, kept so later runs skip the start-up
+
+def process_pool(workers):
+    # spawn, not fork: the caller may be one of several GUI worker threads
+    pool = _POOL.get("pool")
+    if pool is None or _POOL.get("workers") != workers:
+        if pool is not None:
+            pool.shutdown(wait=False)
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+        _POOL.update(pool=pool, workers=workers)
+    return pool
+
+class SharedArrays:
+    """
+    NumPy arrays copied (or allocated empty, given as (shape, dtype)) into
+    shared-memory blocks. `spec` is what another process needs to attach
+    them; the creating process unlinks the blocks when done.
+    """
+    def __init__(self, **arrays):
+        self.blocks, self.arrays, self.spec = [], {}, {}
+        try:
+            for key, value in arrays.items():
+                shape, dtype = value if isinstance(value, tuple) else (value.shape, value.dtype)
+                dtype = np.dtype(dtype)
+                block = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+                self.blocks.append(block)
+                self.arrays[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+                if not isinstance(value, tuple):
+                    self.arrays[key][...] = value
+                self.spec[key] = (block.name, shape, dtype.str)
+        except BaseException:
+            self.release()
+            raise
+
+    @staticmethod
+    def attach(spec):
+        # In a pool worker (which shares the creator's resource tracker, so
+        # nothing is unlinked when it exits): (arrays, blocks)
+        blocks, arrays = [], {}
+        for key, (name, shape, dtype) in spec.items():
+            blocks.append(shared_memory.SharedMemory(name=name))
+            arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=blocks[-1].buf)
+        return arrays, blocks
+
+    @staticmethod
+    def detach(blocks):
+        for block in blocks:
+            try:
+                block.close()
+            except BufferError:
+                pass  # a traceback still holds views; freed when the process exits
+
+    def release(self):
+        self.arrays = {}
+        self.detach(self.blocks)
+        for block in self.blocks:
+            block.unlink()
+        self.blocks = []
+
+def _partition_rows(a, lo, hi):
+    first, last = a["offsets"][lo], a["offsets"][hi]
+    cin, cout = a["cin"][lo:hi], a["cout"][lo:hi]
+    rows, cols = a["rows"][first:last] - lo, a["cols"][first:last]
+    cin[rows, cols] = a["punch_in"][first:last]
+    cout[rows, cols] = a["punch_out"][first:last]
+    flags = flag_mask(cin, cout, a["req_in"], a["req_out"])
+    a["flags"][lo:hi] = flags
+    return lo, count_flags(flags), worked_hours(cin, cout, a["req_in"], a["req_out"]).sum(axis=1)
+
+def _analyze_partition(spec, lo, hi):
+    """Pool worker: scatters and flags employee rows [lo, hi) of the shared grids."""
+    arrays, blocks = SharedArrays.attach(spec)
+    try:
+        return _partition_rows(arrays, lo, hi)
+    finally:
+        arrays.clear()
+        SharedArrays.detach(blocks)
+
+def analyze_partitioned(grid, emp_codes, days, req_in, req_out, workers):
+    """
+    Scatter plus flags for emp_codes x days on `workers` processes, one
+    contiguous employee range each. Returns (cin, cout, flags, counts, worked)
+    like the in-process path, with the partial summaries merged in order.
+    """
+    row = np.full(len(grid.names), -1)
+    row[emp_codes] = np.arange(len(emp_codes))
+    col = pd.Index(encode_days(days)).get_indexer(grid.days)
+    keep = np.flatnonzero((row[grid.codes] >= 0) & (col >= 0))
+    keep = keep[np.argsort(row[grid.codes[keep]], kind='stable')]
+    rows = row[grid.codes[keep]]
+    shape = (len(emp_codes), len(days))
+    bounds = np.linspace(0, shape[0], workers + 1).astype(int)
+
+    shared = SharedArrays(
+        rows=rows, cols=col[keep], punch_in=grid.cin[keep], punch_out=grid.cout[keep],
+        offsets=np.searchsorted(rows, np.arange(shape[0] + 1)),
+        req_in=np.asarray(req_in, dtype=float), req_out=np.asarray(req_out, dtype=float),
+        cin=(shape, np.int32), cout=(shape, np.int32), flags=(shape, np.uint8))
+    try:
+        shared.arrays["cin"][...] = MISSING_TIME
+        shared.arrays["cout"][...] = MISSING_TIME
+        parts = sorted(process_pool(workers).map(_analyze_partition, [shared.spec] * workers,
+                                                 bounds[:-1], bounds[1:]), key=lambda part: part[0])
+        counts = np.concatenate([part[1] for part in parts])
+        worked = np.concatenate([part[2] for part in parts])
+        return (shared.arrays["cin"].copy(), shared.arrays["cout"].copy(), shared.arrays["flags"].copy(),
+                counts, worked)
+    finally:
+        shared.release()
+
+def analyze_grid(grid, shifts, holidays, previous=None, touched=None, workers=1, prof=NULL_PROFILER):
+    """
+    Employee x working-day analysis over a PunchGrid. `previous` is the
+    (calendar, status_df, summary_df) of an earlier run on the same grid
+    (or one it was appended to): when its employees are still listed first,
+    only days that are new, whose required times changed or that are in
+    `touched` (dates that gained punches) get their flags recomputed,
+    employees added since get full rows, and the summary counts are patched
+    instead of recounted. Full runs with `workers` > 1 are split by employee
+    across that many processes (see analyze_partitioned).
+    Returns (summary DataFrame, per-day status table, working-day calendar).
+    """
+    with prof.stage("shift resolution") as rec:
+        shift_cal = shifts if isinstance(shifts, ShiftCalendar) else ShiftCalendar(shifts)
+        calendar = shift_cal.working_days(holidays)
+        emp_codes = grid.employees(shift_cal.start, shift_cal.end)
+        names = grid.names[emp_codes]
+        rec["rows"] = len(calendar)
+    days = calendar["date"].to_numpy()
+    req_in, req_out = calendar["req_in"].to_numpy(), calendar["req_out"].to_numpy()
+    shape = (len(names), len(days))
+
+    worked = None
+    with prof.stage("status computation", rows=shape[0] * shape[1]) as rec:
+        cin, cout = np.full(shape, MISSING_TIME, dtype=np.int32), np.full(shape, MISSING_TIME, dtype=np.int32)
+        flags = np.zeros(shape, dtype=np.uint8)
+        prev_names = previous[2]["Name"].to_numpy() if previous is not None else None
+        if prev_names is not None and np.array_equal(names[:len(prev_names)], prev_names):
+            prev_cal, prev_status, prev_summary = previous
+            n_old = len(prev_names)
+            prev_shape = (n_old, len(prev_cal))
+            src = pd.Index(prev_cal["date"]).get_indexer(days)
+            known = src >= 0
+            if touched is not None:
+                known &= ~pd.Index(days).isin(touched)
+            safe = np.maximum(src, 0)
+            same = known & (prev_cal["req_in"].to_numpy()[safe] == req_in) & (prev_cal["req_out"].to_numpy()[safe] == req_out)
+
+            # Punches for days already on the grid are reused; only new or touched days are scattered
+            cin[:n_old, known] = prev_status["cin"].to_numpy().reshape(prev_shape)[:, src[known]]
+            cout[:n_old, known] = prev_status["cout"].to_numpy().reshape(prev_shape)[:, src[known]]
+            if not known.all():
+                grid.scatter(emp_codes[:n_old], days, cin[:n_old], cout[:n_old], columns=~known)
+            grid.scatter(emp_codes[n_old:], days, cin[n_old:], cout[n_old:])
+
+            prev_flags = prev_status["flags"].to_numpy().reshape(prev_shape)
+            redo = ~same
+            flags[:n_old, same] = prev_flags[:, src[same]]
+            flags[:n_old, redo] = flag_mask(cin[:n_old, redo], cout[:n_old, redo], req_in[redo], req_out[redo])
+            flags[n_old:] = flag_mask(cin[n_old:], cout[n_old:], req_in, req_out)
+            dropped = np.ones(len(prev_cal), dtype=bool)
+            dropped[src[same]] = False
+            counts = np.concatenate([
+                prev_summary[STAT_COLUMNS].to_numpy() - count_flags(prev_flags[:, dropped])
+                + count_flags(flags[:n_old, redo]),
+                count_flags(flags[n_old:]),
+            ])
+        elif workers > 1 and shape[0] >= workers * MIN_PARTITION_EMPLOYEES:
+            cin, cout, flags, counts, worked = analyze_partitioned(grid, emp_codes, days, req_in, req_out, workers)
+            rec["workers"] = workers
+        else:
+            grid.scatter(emp_codes, days, cin, cout)
+            flags = flag_mask(cin, cout, req_in, req_out)
+            counts = count_flags(flags)
+
+    with prof.stage("summary", rows=len(names)):
+        status_df = pd.DataFrame({
+            "emp": np.repeat(np.arange(len(names), dtype=np.int32), len(days)),
+            "day": np.tile(encode_days(days), len(names)),
+            "cin": cin.ravel(),
+            "cout": cout.ravel(),
+            "flags": flags.ravel(),
+        })
+        summary_df = pd.DataFrame({"Name": names, **{col: counts[:, k] for k, col in enumerate(STAT_COLUMNS)}})
+        if worked is None:
+            worked = worked_hours(cin, cout, req_in, req_out).sum(axis=1)
+        summary_df[WORKED_COLUMN] = worked.round(2)
+    return summary_df, status_df, calendar
+
+def analyze(df, shifts, holidays, col_map, log=None, emp_index=None, workers=1, prof=NULL_PROFILER):
+    """
+    Builds the employee x working-day grid once, scatters the punches onto it
+    and computes every status flag as a NumPy column operation. `shifts` is
+    a list of shift periods or a prebuilt ShiftCalendar; `workers` > 1 splits
+    large runs across processes.
+    Returns (summary DataFrame with one row per employee, per-day status table).
+    """
+    grid = PunchGrid(df, col_map, log=log, emp_index=emp_index, prof=prof)
+    summary_df, status_df, _ = analyze_grid(grid, shifts, holidays, workers=workers, prof=prof)
+    return summary_df, status_df
+
+# =============================================================================
+# PER-DAY STATUS TABLE
+# =============================================================================
+# The analysis emits one row per (employee, working day), all compactly
+# encoded: int32 employee code (position in EmployeeIndex.names), int32 day
+# ordinal, int32 in/out seconds since midnight (MISSING_TIME = no punch) and
+# a uint8 mask of STATUS_BITS. The results view and the reports are rendered
+# from it without re-parsing anything; the summary counts come from the
+# employee x day grids (count_flags in analyze_grid), not from this table.
+
+def status_labels(mask):
+    """Report labels for a flag mask, as check_attendance_status names them."""
+    if mask & STATUS_BITS["Absents"]: return ["Absent"]
+    if mask & STATUS_BITS["Suspicious"]: return ["Suspicious (No In)"]
+    labels = [label for col, label in (("Lates", "Late"), ("Early", "Early"), ("No Out", "No Out"))
+              if mask & STATUS_BITS[col]]
+    return labels or ["Present"]
+
+def format_hhmm(secs, missing="-"):
+    # One label per minute of the day, picked by index instead of formatted per row
+    lut = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(SECONDS_PER_DAY // 60)] + [missing], dtype=object)
+    secs = decode_times(secs)
+    # Past-midnight punches of overnight shifts (>= 24h) show as clock times
+    minutes = np.where(np.isnan(secs), len(lut) - 1, np.floor(np.nan_to_num(secs) / 60) % (len(lut) - 1)).astype(np.intp)
+    return lut[minutes]
+
+def status_frame(status_df, names):
+    """Display form of the status table: Name, Date, In, Out, Status."""
+    labels = np.array([", ".join(status_labels(m)) for m in range(1 << len(STATUS_BITS))], dtype=object)
+    return pd.DataFrame({
+        "Name": pd.Categorical.from_codes(status_df["emp"].to_numpy(), categories=pd.Index(names)),
+        "Date": decode_days(status_df["day"].to_numpy()),
+        # Kept as object columns: no round trip through pandas' string dtype
+        "In": pd.Series(format_hhmm(status_df["cin"].to_numpy()), dtype=object),
+        "Out": pd.Series(format_hhmm(status_df["cout"].to_numpy()), dtype=object),
+        "Status": pd.Series(labels[status_df["flags"].to_numpy()], dtype=object),
+    })
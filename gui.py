@@ -1,12 +1,9 @@
 import sys
-import pandas as pd
-from datetime import datetime, timedelta
 import os
-import io # New: For handling image buffers
-
-# --- Matplotlib for Graphs ---
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
+import importlib
+import threading
+import time
+from collections import OrderedDict
 
 # --- Qt Imports ---
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
@@ -14,40 +11,69 @@ from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                                QFileDialog, QTableView, QComboBox, QHeaderView, 
                                QMessageBox, QGroupBox, QLineEdit, QDateEdit, 
                                QTimeEdit, QTableWidget, QTableWidgetItem, QTextEdit, 
-                               QProgressBar, QSplitter)
-from PySide6.QtCore import Qt, QAbstractTableModel, QThread, Signal, QDate, QTime
+                               QProgressBar, QSplitter, QCheckBox, QListWidget, QListWidgetItem,
+                               QSpinBox, QMenu)
+from PySide6.QtCore import (Qt, QAbstractTableModel, QModelIndex, QObject, QRunnable, QThreadPool, Signal,
+                            QDate, QTime, QTimer)
 from PySide6.QtGui import QColor
 
-# --- PDF Generation Imports ---
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, KeepTogether, Image as RLImage
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
+from profiler import StageProfiler
+
+# =============================================================================
+# LAZY IMPORTS: the window shows before pandas, ReportLab and matplotlib load
+# =============================================================================
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access."""
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+engine = LazyModule("engine")
+ingest = LazyModule("ingest")
+reports = LazyModule("reports")
+batch = LazyModule("batch")
+colors = LazyModule("reportlab.lib.colors")
+
+# Imported in the background once the window is up, so the first click rarely waits
+WARM_UP_MODULES = ("engine", "ingest", "reports", "matplotlib.figure", "matplotlib.backends.backend_agg")
+
+def warm_up():
+    for name in WARM_UP_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass  # reported with context on first real use
 
 # =============================================================================
 # HELPER: LOGIC ENGINE (Centralized Rules)
 # =============================================================================
 def check_attendance_status(cin, cout, shift_in, shift_out):
+    # Punches and required times as comparable values (None = no punch); for
+    # shifts crossing midnight, seconds from engine.shift_relative
     status_flags = []
-    
-    # Grayscale/Report Colors
-    col_minor = colors.Color(0.92, 0.92, 0.92) 
-    col_major = colors.Color(0.75, 0.75, 0.75) 
+    col_minor = reports.COL_MINOR
+    col_major = reports.COL_MAJOR
 
-    if not cin and not cout:
+    if cin is None and cout is None:
         return ["Absent"], col_major
 
-    if not cin and cout:
+    if cin is None and cout is not None:
         return ["Suspicious (No In)"], col_major
 
-    if cin and cin > shift_in:
+    if cin is not None and cin > shift_in:
         status_flags.append("Late")
 
-    if cout:
+    if cout is not None:
         if cout < shift_out: 
             status_flags.append("Early")
-    elif cin and not cout:
+    elif cin is not None and cout is None:
         status_flags.append("No Out")
 
     bg_color = colors.white
@@ -65,137 +91,487 @@ def check_attendance_status(cin, cout, shift_in, shift_out):
 # HELPER: PANDAS MODEL FOR QT TABLE VIEW
 # =============================================================================
 class PandasModel(QAbstractTableModel):
+    """
+    Read-only view of a DataFrame held as one NumPy array per column. Cells
+    are formatted only when painted and the strings kept in a bounded LRU;
+    rows are handed to the view FETCH_ROWS at a time through canFetchMore /
+    fetchMore, so a million-row punch log opens and scrolls without stalls.
+    Sorting and filtering compute a row order over the backing arrays with
+    pandas/NumPy (no per-row Qt comparisons) and the view shows rows in it.
+    """
+    FETCH_ROWS = 2000
+    CACHE_CELLS = 50_000
+
     def __init__(self, data):
         super(PandasModel, self).__init__()
-        self._data = data
-
-    def rowCount(self, parent=None):
-        return self._data.shape[0]
-
-    def columnCount(self, parent=None):
-        return self._data.shape[1]
+        self._headers = [str(c) for c in data.columns]
+        # Extension dtypes (nullable ints, categories) as objects so str() matches pandas
+        self._arrays = [s.to_numpy() if isinstance(s.dtype, np.dtype) else s.to_numpy(dtype=object)
+                        for s in (data.iloc[:, i] for i in range(data.shape[1]))]
+        self._rows = np.arange(len(data))  # view row -> backing row, after filter and sort
+        self._loaded = min(len(self._rows), self.FETCH_ROWS)
+        self._cache = OrderedDict()  # (backing row, column) -> text, survives re-sorting
+        self._sort_key = None
+        self._factorized = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._arrays)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._rows)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid(): return
+        count = min(self.FETCH_ROWS, len(self._rows) - self._loaded)
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def format_cell(self, row, col):
+        # `row` indexes the backing arrays, not the (sorted/filtered) view
+        val = self._arrays[col][row]
+        kind = self._arrays[col].dtype.kind
+        # Match str() of the pandas scalar the frame would return (Timestamp, not datetime64)
+        if kind == 'M': val = pd.Timestamp(val)
+        elif kind == 'm': val = pd.Timedelta(val)
+        return str(val)
 
     def data(self, index, role=Qt.DisplayRole):
         if index.isValid():
             if role == Qt.DisplayRole:
-                val = self._data.iloc[index.row(), index.column()]
-                return str(val)
+                key = (self._rows[index.row()], index.column())
+                text = self._cache.get(key)
+                if text is None:
+                    text = self._cache[key] = self.format_cell(*key)
+                    if len(self._cache) > self.CACHE_CELLS:
+                        self._cache.popitem(last=False)
+                else:
+                    self._cache.move_to_end(key)
+                return text
         return None
 
     def headerData(self, col, orientation, role):
         if orientation == Qt.Horizontal and role == Qt.DisplayRole:
-            return str(self._data.columns[col])
+            return self._headers[col]
         return None
 
+    def total_rows(self):
+        return len(self._arrays[0]) if self._arrays else 0
+
+    def visible_rows(self):
+        return len(self._rows)
+
+    def _set_rows(self, rows):
+        self.beginResetModel()
+        self._rows = rows
+        self._loaded = min(len(rows), self.FETCH_ROWS)
+        self.endResetModel()
+
+    def _sorted(self, rows):
+        if self._sort_key is None:
+            return rows
+        column, order = self._sort_key
+        keys = pd.Series(self._arrays[column][rows])
+        asc = order == Qt.AscendingOrder
+        try:
+            perm = keys.sort_values(ascending=asc, kind='stable', na_position='last').index
+        except TypeError:  # mixed types in a raw column: compare as text
+            perm = keys.astype(str).sort_values(ascending=asc, kind='stable').index
+        return rows[perm.to_numpy()]
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._sort_key = (column, order) if column >= 0 else None
+        rows = self._rows if self._sort_key else np.sort(self._rows)
+        self._set_rows(self._sorted(rows))
+
+    def set_filter(self, text, column=0):
+        """Keeps rows whose `column` contains `text` (case-insensitive)."""
+        rows = np.arange(self.total_rows())
+        if text:
+            # Match each distinct value once, then broadcast through the codes
+            if column not in self._factorized:
+                self._factorized[column] = pd.factorize(self._arrays[column])
+            codes, uniques = self._factorized[column]
+            hit = pd.Series(uniques).astype(str).str.contains(text, case=False, regex=False).to_numpy()
+            rows = rows[np.append(hit, False)[codes]]  # code -1 (missing) never matches
+        self._set_rows(self._sorted(rows))
+
 # =============================================================================
-# WORKER THREAD FOR PROCESSING
+# BACKGROUND JOBS
 # =============================================================================
-class AnalysisWorker(QThread):
-    log_signal = Signal(str)
-    progress_signal = Signal(int)
-    finished_signal = Signal(object, object, object) 
-
-    def __init__(self, raw_df, shifts, holidays, col_map):
+# Progress and log signals from jobs reach the GUI at most this often
+SIGNAL_INTERVAL_S = 0.1
+# A finished job's error value when the user cancelled it
+CANCELLED = "cancelled"
+# Pool threads: at least two, so an export can run next to an analysis
+MAX_JOBS = max(2, os.cpu_count() or 1)
+
+class Throttle:
+    """
+    Rate-limits a worker signal to one emit per `interval` seconds so a
+    per-employee loop cannot flood the event loop. Progress keeps only the
+    latest value; with batch=True (log lines) messages are buffered and sent
+    together so none are lost. flush() sends whatever is still held back;
+    the JobQueue calls it every `interval` so a held-back value never waits
+    for the job's next call.
+    """
+    def __init__(self, emit, interval=SIGNAL_INTERVAL_S, batch=False):
+        self.emit = emit
+        self.interval = interval
+        self.batch = batch
+        self._pending = []
+        self._last = 0.0
+        self._lock = threading.Lock()  # the job's thread and the GUI's timer both flush
+
+    def __call__(self, value):
+        with self._lock:
+            if self.batch:
+                self._pending.append(value)
+            else:
+                self._pending = [value]
+            if time.monotonic() - self._last >= self.interval:
+                self._send()
+
+    def flush(self):
+        with self._lock:
+            self._send()
+
+    def _send(self):
+        if self._pending:
+            self.emit("\n".join(self._pending) if self.batch else self._pending[-1])
+            self._pending = []
+        self._last = time.monotonic()
+
+class JobSignals(QObject):
+    # QRunnable is not a QObject, so a job's signals live on this helper
+    log = Signal(str)
+    progress = Signal(int)
+    started = Signal()
+    finished = Signal(object, object)  # (result, error message / CANCELLED / None)
+
+class Job(QRunnable):
+    """
+    One unit of background work for the JobQueue. execute() runs on a pool
+    thread and returns the job's result; it reports through self.log and
+    self.progress (both throttled) and calls check_cancelled() between steps.
+    `operation` names the job in the stage trace, `title` in the jobs list.
+    """
+    def __init__(self, operation, title, work=None):
         super().__init__()
+        self.setAutoDelete(False)  # the queue owns the job until its finished signal is handled
+        self.signals = JobSignals()
+        self.operation = operation
+        self.title = title
+        self.work = work
+        self.state = "queued"
+        self._cancel = threading.Event()
+        self.log = Throttle(self.signals.log.emit, batch=True)
+        self.progress = Throttle(self.signals.progress.emit)
+        self.prof = StageProfiler(log=self.log)
+
+    def cancel(self):
+        self._cancel.set()
+
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        # Cooperative cancellation point (see JobQueue.cancel)
+        if self.cancelled():
+            raise engine.Cancelled()
+
+    def step(self, done, total):
+        self.progress(int(done / total * 100) if total else 100)
+
+    def execute(self):
+        return self.work(self)
+
+    def run(self):
+        self.state = "running"
+        self.signals.started.emit()
+        try:
+            self.check_cancelled()
+            result = self.execute()
+            self.state = "done"
+            self.progress.flush()
+            self.log.flush()
+            self.signals.finished.emit(result, None)
+        except engine.Cancelled:
+            self.state = "cancelled"
+            self.log.flush()
+            self.signals.finished.emit(None, CANCELLED)
+        except Exception as e:
+            import traceback
+            self.state = "failed"
+            self.log.flush()
+            self.signals.finished.emit(None, f"{str(e)}\n{traceback.format_exc()}")
+
+class JobQueue(QObject):
+    """
+    Runs Jobs on a QThreadPool of MAX_JOBS threads; further jobs wait in
+    the pool's queue. Keeps every job referenced until it has finished.
+    """
+    def __init__(self, max_jobs=MAX_JOBS, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_jobs)
+        self.jobs = []
+        # Trailing edge of the job signal throttles (see Throttle)
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(int(SIGNAL_INTERVAL_S * 1000))
+        self.flush_timer.timeout.connect(self.flush_signals)
+
+    def submit(self, job):
+        self.jobs.append(job)
+        self.flush_timer.start()
+        job.signals.finished.connect(lambda *_: self.jobs.remove(job) if job in self.jobs else None)
+        self.pool.start(job)
+        return job
+
+    def flush_signals(self):
+        for job in self.jobs:
+            if job.state == "running":
+                job.progress.flush()
+                job.log.flush()
+        if not self.jobs:
+            self.flush_timer.stop()
+
+    def cancel(self, job):
+        job.cancel()
+        if job.state == "queued" and self.pool.tryTake(job):
+            # Never started: report it right away instead of when a thread frees up
+            job.state = "cancelled"
+            job.signals.finished.emit(None, CANCELLED)
+
+    def cancel_all(self):
+        for job in list(self.jobs):
+            self.cancel(job)
+
+    def active(self):
+        return [job for job in self.jobs if job.state in ("queued", "running")]
+
+    def wait(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
+
+class AnalysisWorker(Job):
+    """Analysis run as a Job; its result is (summary_df, context)."""
+    def __init__(self, raw_df, shifts, holidays, col_map, vectorized=True, source_path=None,
+                 store=None, file_key=None, previous=None, append_path=None, workers=1):
+        super().__init__("analysis", "Append punches" if append_path else "Analysis")
+        self.previous = previous  # context of the last run on the same loaded file
+        self.append_path = append_path  # extra punches to merge into `previous`
         self.raw_df = raw_df
-        self.shifts = shifts
+        self.source_path = source_path
+        self.store = store
+        self.file_key = file_key
+        # A snapshot: the app edits its shift list in place, and the next run
+        # compares its shifts with this run's (see `reusable` in execute)
+        self.shifts = [dict(s) for s in shifts]
         self.holidays = holidays
         self.col_map = col_map
+        self.vectorized = vectorized
+        self.workers = workers  # processes for a full run on a large file (engine.analyze_partitioned)
 
     def parse_time(self, value):
-        if pd.isna(value) or value == "" or str(value).strip().lower() in ['nan', 'nat', 'none']:
-            return None
-        if isinstance(value, (float, int)):
-            try:
-                return (datetime(1899, 12, 30) + timedelta(days=float(value))).time()
-            except:
-                pass
-        value = str(value).strip()
-        fmts = ["%I:%M:%S %p", "%I:%M %p", "%H:%M:%S", "%H:%M", "%Y-%m-%d %H:%M:%S"]
-        for fmt in fmts:
-            try:
-                return datetime.strptime(value, fmt).time()
-            except ValueError:
-                continue
-        return None
-
-    def run(self):
-        try:
-            self.log_signal.emit("🔄 Initializing Data Processing...")
-            df = self.raw_df.copy()
-            
-            c_name = self.col_map['name']
-            c_date = self.col_map['date']
-            c_in = self.col_map['in']
-            c_out = self.col_map['out']
-
-            # 1. Parse Dates
-            self.log_signal.emit("📅 Parsing Date Column...")
-            df[c_date] = pd.to_datetime(df[c_date], errors='coerce', dayfirst=True)
-            df = df.dropna(subset=[c_date])
-
-            # 2. Filter Global Range
-            min_date = min(s['start'] for s in self.shifts)
-            max_date = max(s['end'] for s in self.shifts)
-            df = df[(df[c_date] >= min_date) & (df[c_date] <= max_date)]
-
-            unique_names = df[c_name].unique()
-            total_ppl = len(unique_names)
-            self.log_signal.emit(f"👤 Found {total_ppl} unique employees.")
-
-            summary_rows = []
-            
-            # 3. Main Loop
-            for i, name in enumerate(unique_names):
-                person_df = df[df[c_name] == name]
-                stats = {"Present": 0, "Lates": 0, "Early": 0, "Absents": 0, "Suspicious": 0, "No Out": 0}
-
-                for date in pd.date_range(start=min_date, end=max_date):
-                    if date.weekday() == 6 or date in self.holidays:
-                        continue
-
-                    shift = next((s for s in self.shifts if s['start'] <= date <= s['end']), None)
-                    if not shift: continue 
-
-                    record = person_df[person_df[c_date] == date]
-                    cin, cout = None, None
-
-                    if not record.empty:
-                        cin = self.parse_time(record[c_in].values[0])
-                        cout = self.parse_time(record[c_out].values[0])
-
-                    # Get Rule-Based Status
-                    req_out = shift['friout'] if date.weekday() == 4 else shift['cout']
-                    flags, _ = check_attendance_status(cin, cout, shift['cin'], req_out)
-
-                    # Update Stats
-                    if "Absent" in flags: stats["Absents"] += 1
-                    if "Suspicious (No In)" in flags: stats["Suspicious"] += 1
-                    if "Late" in flags: stats["Lates"] += 1
-                    if "Early" in flags: stats["Early"] += 1
-                    if "No Out" in flags: stats["No Out"] += 1
-                    if "Present" in flags or "Late" in flags or "Early" in flags:
-                        stats["Present"] += 1
-
-                summary_rows.append({"Name": name, **stats})
-                self.progress_signal.emit(int(((i + 1) / total_ppl) * 100))
-
-            summary_df = pd.DataFrame(summary_rows)
-            
-            context = {
-                "clean_df": df,
-                "min_date": min_date,
-                "max_date": max_date,
-                "col_map": self.col_map,
-                "shifts": self.shifts,
-                "holidays": self.holidays
-            }
-            
-            self.finished_signal.emit(summary_df, context, None)
+        return engine.parse_time(value)
+
+    def execute(self):
+        self.log("🔄 Initializing Data Processing...")
+        prof = self.prof
+        shift_cal = engine.ShiftCalendar(self.shifts)
+        min_date, max_date = shift_cal.start, shift_cal.end
+
+        prev = self.previous
+        reusable = (self.vectorized and prev and prev.get("punch_grid") is not None
+                    and prev["col_map"] == self.col_map and prev["punch_grid"].covers(min_date, max_date)
+                    # Overnight cutovers decide which day a swipe lands on
+                    and (not self.col_map.get('swipes') or prev["shifts"] == self.shifts))
+        if self.append_path and not reusable:
+            raise ValueError("Run the analysis on the main file first, with the same columns "
+                             "and a shift window inside the analysed one, then append.")
+        appended = None
+        if reusable:
+            # Parsed punches are reused; only changed (or appended-to) days are redone
+            grid, touched = prev["punch_grid"], None
+            if self.append_path:
+                grid, touched, appended = self.append_punches(grid)
+                self.check_cancelled()
+            else:
+                self.log("⚡ Same file and columns: recomputing changed days only...")
+            summary_df, status_df, calendar = engine.analyze_grid(
+                grid, shift_cal, self.holidays, touched=touched, prof=prof,
+                previous=(prev["calendar"], prev["status_df"], prev["summary_df"]))
+            self.log(f"👤 Found {len(summary_df)} unique employees.")
+            self.progress(100)
+        else:
+            # 1. Parse Dates & 2. Filter Global Range
+            self.log("📅 Parsing Date Column...")
+            df = ingest.load_window(self.col_map, min_date, max_date, raw_df=self.raw_df,
+                                    path=self.source_path, store=self.store, file_key=self.file_key,
+                                    log=self.log, shift_cal=shift_cal, prof=prof,
+                                    cancelled=self.cancelled)
+            self.check_cancelled()
+            self.progress(40)
+
+            emp_index = engine.EmployeeIndex(df, self.col_map['name'], self.col_map['date'])
+            self.log(f"👤 Found {len(emp_index)} unique employees.")
+
+            # 3. Status Computation
+            grid, calendar = None, None
+            if self.vectorized:
+                grid = engine.PunchGrid(df, engine.punch_columns(self.col_map), window=(min_date, max_date),
+                                        log=self.log, emp_index=emp_index, prof=prof)
+                self.check_cancelled()
+                self.progress(70)
+                summary_df, status_df, calendar = engine.analyze_grid(grid, shift_cal, self.holidays,
+                                                                      workers=self.workers, prof=prof)
+                self.progress(100)
+            else:
+                with prof.stage("status computation", rows=len(df)):
+                    summary_df, status_df = self.run_loop(emp_index, shift_cal)
+        self.log(f"🧠 Time parse cache: {engine.PUNCH_CACHE.summary()}")
+
+        context = {
+            "names": summary_df["Name"].to_numpy(),
+            "summary_df": summary_df,
+            "status_df": status_df,
+            "punch_grid": grid,
+            "calendar": calendar,
+            "appended": appended,
+            "min_date": min_date,
+            "max_date": max_date,
+            "col_map": self.col_map,
+            "shifts": self.shifts,
+            "shift_calendar": shift_cal,
+            "holidays": self.holidays
+        }
+        return summary_df, context
+
+    def append_punches(self, grid):
+        self.log(f"➕ Reading new punches from {os.path.basename(self.append_path)}...")
+        df = ingest.load_window(self.col_map, *grid.window, path=self.append_path, log=self.log,
+                                shift_cal=engine.ShiftCalendar(self.shifts), prof=self.prof,
+                                cancelled=self.cancelled)
+        delta = engine.PunchGrid(df, engine.punch_columns(self.col_map), window=grid.window,
+                                 log=self.log, prof=self.prof)
+        # Swipe days can continue in the next export (night shifts crossing midnight)
+        merged, added, changed = grid.append(delta, merge=bool(self.col_map.get('swipes')))
+        touched = engine.decode_days(np.unique(delta.days[added | changed]))
+        new_days = np.setdiff1d(touched, engine.decode_days(np.unique(grid.days)))
+        appended = {"rows": int(added.sum()), "merged": int(changed.sum()),
+                    "skipped": int(len(added) - added.sum() - changed.sum()),
+                    "dates": len(touched), "days": len(new_days)}
+        self.log(f"➕ Added {appended['rows']:,} punch rows on {len(touched)} dates "
+                 f"({len(new_days)} new days); {appended['merged']:,} extended an existing day, "
+                 f"{appended['skipped']:,} repeated an existing name and date and were skipped.")
+        return merged, touched, appended
+
+    def run_loop(self, emp_index, shift_cal):
+        # Reference per-employee, per-day implementation (slow on large files)
+        day_map = engine.punch_columns(self.col_map)
+        c_date = day_map['date']
+        c_in = day_map['in']
+        c_out = day_map['out']
+
+        total_ppl = len(emp_index)
+        summary_rows = []
+        status_rows = []
+        working_days = list(shift_cal.iter_days(self.holidays))
+
+        for i, (name, person_df) in enumerate(emp_index):
+            self.check_cancelled()
+            stats = {"Present": 0, "Lates": 0, "Early": 0, "Absents": 0, "Suspicious": 0, "No Out": 0}
+            worked = 0.0
+
+            for date, shift in working_days:
+                record = person_df[person_df[c_date] == date]
+                cin, cout = None, None
+
+                if not record.empty:
+                    cin = self.parse_time(record[c_in].values[0])
+                    cout = self.parse_time(record[c_out].values[0])
+
+                # Get Rule-Based Status, in seconds from the workday's midnight
+                req_out = shift['friout'] if date.weekday() == 4 else shift['cout']
+                req_in_s, req_out_s = engine.time_to_seconds(shift['cin']), engine.time_to_seconds(req_out)
+                cin_s = engine.time_to_seconds(cin) if cin else np.nan
+                cout_s = engine.time_to_seconds(cout) if cout else np.nan
+                rel_in, rel_out, rel_req_out = engine.shift_relative(np.float64(cin_s), np.float64(cout_s),
+                                                                     req_in_s, req_out_s)
+                flags, _ = check_attendance_status(None if np.isnan(rel_in) else float(rel_in),
+                                                   None if np.isnan(rel_out) else float(rel_out),
+                                                   req_in_s, float(rel_req_out))
+
+                # Update Stats
+                day = []
+                if "Absent" in flags: day.append("Absents")
+                if "Suspicious (No In)" in flags: day.append("Suspicious")
+                if "Late" in flags: day.append("Lates")
+                if "Early" in flags: day.append("Early")
+                if "No Out" in flags: day.append("No Out")
+                if "Present" in flags or "Late" in flags or "Early" in flags:
+                    day.append("Present")
+                for key in day: stats[key] += 1
+
+                worked += float(engine.worked_hours(cin_s, cout_s, req_in_s, req_out_s))
+                status_rows.append((i, date, cin_s, cout_s, sum(engine.STATUS_BITS[key] for key in day)))
+
+            summary_rows.append({"Name": name, **stats, engine.WORKED_COLUMN: round(worked, 2)})
+            self.progress(int(((i + 1) / total_ppl) * 100))
+
+        status_df = pd.DataFrame(status_rows, columns=["emp", "day", "cin", "cout", "flags"])
+        status_df = status_df.assign(day=engine.encode_days(status_df["day"]), cin=engine.encode_times(status_df["cin"]),
+                                     cout=engine.encode_times(status_df["cout"]))
+        return pd.DataFrame(summary_rows), status_df.astype({"emp": np.int32, "flags": np.uint8})
 
-        except Exception as e:
-            import traceback
-            self.finished_signal.emit(None, None, f"{str(e)}\n{traceback.format_exc()}")
+# =============================================================================
+# EXPORT JOBS
+# =============================================================================
+# Individual report modes (index of the combo next to the export button)
+PDF_MODE_SINGLE, PDF_MODE_PARALLEL, PDF_MODE_PER_EMPLOYEE = range(3)
+
+# Export jobs read the finished run's frames without copying them: a run never
+# changes them once it has finished (a re-run, even an incremental one, builds new ones)
+def detailed_report_job(path, report_args, mode):
+    def work(job):
+        if mode == PDF_MODE_SINGLE:
+            reports.build_detailed_pdf(path, *report_args, prof=job.prof, progress=job.step, cancelled=job.cancelled)
+            return [path]
+        per_employee = mode == PDF_MODE_PER_EMPLOYEE
+        if not per_employee and reports.PdfWriter is None:
+            job.log("⚠️ pypdf not installed: building the report in a single process.")
+        with job.prof.stage("PDF build", rows=len(report_args[1])):
+            return reports.build_detailed_pdf_parallel(path, *report_args, per_employee=per_employee,
+                                                       progress=job.step, cancelled=job.cancelled)
+    return Job("detailed_pdf", "Individual reports (PDF)", work)
+
+def executive_report_job(path, summary_df, chart_format="png"):
+    def work(job):
+        reports.build_executive_pdf(path, summary_df, prof=job.prof, cancelled=job.cancelled,
+                                    chart_format=chart_format, log=job.log)
+        return [path]
+    return Job("executive_pdf", "Executive summary (PDF)", work)
+
+def summary_xlsx_job(path, summary_df, per_file=None):
+    # per_file: batch results, written as combined, per-file totals and one sheet per file
+    def work(job):
+        with job.prof.stage("xlsx export", rows=len(summary_df)):
+            if per_file:
+                batch.write_workbook(path, per_file, summary_df)
+            else:
+                summary_df.to_excel(path, index=False)
+        return [path]
+    return Job("summary_xlsx", "Summary (Excel)", work)
+
+def batch_analysis_job(sources, col_map, shift_cal, holidays):
+    # Result: (per-file results, {path: error}) from batch.analyze_batch
+    def work(job):
+        return batch.analyze_batch(sources, col_map, shift_cal, holidays, log=job.log, progress=job.step,
+                                   cancelled=job.cancelled, prof=job.prof)
+    return Job("batch_analysis", "Batch analysis", work)
 
 # =============================================================================
 # MAIN WINDOW CLASS
@@ -206,10 +582,20 @@ class AttendanceApp(QMainWindow):
         self.setWindowTitle("Attendance Analytics Pro (Report Edition)")
         self.resize(1200, 850)
         self.raw_df = None
+        self.file_path = None
+        self.last_run = None  # context reused by the next run while the file stays loaded
+        self.store = None  # ingest.PunchStore, created with the first file
+        self.file_key = None
         self.summary_df = None
         self.context_data = None
         self.shifts = []
+        self.jobs = JobQueue(parent=self)
+        self.worker = None  # AnalysisWorker of the current/last run
+        self.trace = StageProfiler()  # stages of every run/export, saved when "Save stage trace" is on
+        self.trace_path = os.environ.get("ATTENDANCE_TRACE")
         self.init_ui()
+        # Once the event loop runs (window painted); daemon so closing never waits on it
+        QTimer.singleShot(0, lambda: threading.Thread(target=warm_up, daemon=True).start())
 
     def init_ui(self):
         main_widget = QWidget()
@@ -220,12 +606,15 @@ class AttendanceApp(QMainWindow):
         self.tab_import = QWidget()
         self.tab_rules = QWidget()
         self.tab_process = QWidget()
+        self.tab_results = QWidget()
         self.tabs.addTab(self.tab_import, "1. Data Import")
         self.tabs.addTab(self.tab_rules, "2. Shift Rules")
         self.tabs.addTab(self.tab_process, "3. Process & Export")
+        self.tabs.addTab(self.tab_results, "4. Results")
         self.setup_import_tab()
         self.setup_rules_tab()
         self.setup_process_tab()
+        self.setup_results_tab()
 
     # --- TAB 1: IMPORT ---
     def setup_import_tab(self):
@@ -236,7 +625,9 @@ class AttendanceApp(QMainWindow):
         btn_load.clicked.connect(self.load_file)
         self.lbl_file = QLabel("No file loaded")
         self.lbl_file.setStyleSheet("color: gray; font-style: italic;")
+        self.chk_stream = QCheckBox("Low-memory mode (stream file, preview first rows only)")
         top_bar.addWidget(btn_load)
+        top_bar.addWidget(self.chk_stream)
         top_bar.addWidget(self.lbl_file)
         top_bar.addStretch()
         layout.addLayout(top_bar)
@@ -248,12 +639,17 @@ class AttendanceApp(QMainWindow):
         self.combo_date = QComboBox()
         self.combo_in = QComboBox()
         self.combo_out = QComboBox()
+        self.lbl_date = QLabel("Date Column:")
+        self.lbl_in = QLabel("Clock In:")
+        self.chk_swipes = QCheckBox("Raw swipe log (one row per swipe)")
+        self.chk_swipes.toggled.connect(self.set_swipe_mode)
         form_layout = QVBoxLayout()
+        form_layout.addWidget(self.chk_swipes)
         form_layout.addWidget(QLabel("Name Column:"))
         form_layout.addWidget(self.combo_name)
-        form_layout.addWidget(QLabel("Date Column:"))
+        form_layout.addWidget(self.lbl_date)
         form_layout.addWidget(self.combo_date)
-        form_layout.addWidget(QLabel("Clock In:"))
+        form_layout.addWidget(self.lbl_in)
         form_layout.addWidget(self.combo_in)
         form_layout.addWidget(QLabel("Clock Out:"))
         form_layout.addWidget(self.combo_out)
@@ -274,21 +670,55 @@ class AttendanceApp(QMainWindow):
         path, _ = QFileDialog.getOpenFileName(self, "Open File", "", "Excel Files (*.xlsx *.xls);;CSV Files (*.csv)")
         if not path: return
         try:
-            if path.endswith('.csv'): self.raw_df = pd.read_csv(path)
-            elif path.endswith('.xls'): self.raw_df = pd.read_excel(path, engine='xlrd')
-            else: self.raw_df = pd.read_excel(path, engine='openpyxl')
-            self.lbl_file.setText(os.path.basename(path))
+            if self.store is None:
+                self.store = ingest.PunchStore()
+            self.last_run = None
+            self.btn_append.setEnabled(False)
+            self.lbl_append.setText("")
+            self.file_key = self.store.file_key(path) if self.store.enabled else None
+            cached = self.store.load_preview(self.file_key) if self.file_key else None
+            last_map = None
+            if cached is not None:
+                # Seen this exact file before: skip Excel/CSV parsing entirely
+                self.raw_df = None
+                preview, last_map = cached
+            elif self.chk_stream.isChecked():
+                self.raw_df = None
+                preview = ingest.read_preview(path)
+            else:
+                prof = StageProfiler(log=self.log)
+                with prof.stage("load") as rec:
+                    self.raw_df = ingest.read_file(path)
+                    rec["rows"] = len(self.raw_df)
+                self.record_trace(prof, "load_file")
+                preview = self.raw_df  # the model pages through the whole file
+            if cached is None and self.file_key:
+                self.store.store_preview(self.file_key, preview.head(ingest.PREVIEW_ROWS))
+            self.file_path = path
+            self.lbl_file.setText(os.path.basename(path) + (" (cached)" if cached is not None else ""))
             self.lbl_file.setStyleSheet("color: green; font-weight: bold;")
-            model = PandasModel(self.raw_df.head(100))
+            model = PandasModel(preview)
             self.table_view.setModel(model)
             self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
-            cols = list(self.raw_df.columns)
+            cols = list(preview.columns)
             for box in [self.combo_name, self.combo_date, self.combo_in, self.combo_out]:
                 box.clear()
                 box.addItems(cols)
             self.auto_map_columns(cols)
+            if last_map:
+                self.combo_name.setCurrentText(last_map['name'])
+                self.combo_date.setCurrentText(last_map['date'])
+                self.combo_in.setCurrentText(last_map['in'])
+                self.combo_out.setCurrentText(last_map['out'])
+                self.chk_swipes.setChecked(bool(last_map.get('swipes')))
         except Exception as e: QMessageBox.critical(self, "Load Error", str(e))
 
+    def set_swipe_mode(self, on):
+        # Swipe logs are reduced to first in / last out, so there is no out column to map
+        self.lbl_date.setText("Date / Timestamp Column:" if on else "Date Column:")
+        self.lbl_in.setText("Swipe Time Column (or the timestamp again):" if on else "Clock In:")
+        self.combo_out.setEnabled(not on)
+
     def auto_map_columns(self, cols):
         cols_lower = [c.lower() for c in cols]
         def set_idx(combo, keywords):
@@ -361,6 +791,11 @@ class AttendanceApp(QMainWindow):
         if ts_start > ts_end:
             QMessageBox.warning(self, "Error", "Start date must be before End date.")
             return
+        clash = [s for s in self.shifts if engine.find_overlaps([s, {"start": ts_start, "end": ts_end}])]
+        if clash:
+            QMessageBox.warning(self, "Error", f"Shift overlaps the existing period "
+                                f"{clash[0]['start'].date()} to {clash[0]['end'].date()}.")
+            return
         new_shift = {
             "start": ts_start,
             "end": ts_end,
@@ -392,22 +827,75 @@ class AttendanceApp(QMainWindow):
         self.btn_run.setStyleSheet("font-size: 14px; font-weight: bold;")
         self.btn_run.clicked.connect(self.start_processing)
         
+        self.btn_append = QPushButton("➕ Append New Punches")
+        self.btn_append.setToolTip("Merge a later export (e.g. today's punches) into the current analysis")
+        self.btn_append.setEnabled(False)
+        self.btn_append.clicked.connect(self.start_append)
+
+        self.btn_batch = QPushButton("🗂️ Batch Analysis")
+        self.btn_batch.setToolTip("Analyse several files (e.g. one per branch) with the current column "
+                                  "mapping and rules, and combine their summaries")
+        batch_menu = QMenu(self.btn_batch)
+        batch_menu.addAction("Files...", self.start_batch_files)
+        batch_menu.addAction("Folder...", self.start_batch_folder)
+        self.btn_batch.setMenu(batch_menu)
+
         self.btn_pdf = QPushButton("📄 Individual Reports (PDF)")
         self.btn_pdf.setEnabled(False)
         self.btn_pdf.clicked.connect(self.export_pdf)
+        self.combo_pdf_mode = QComboBox()
+        self.combo_pdf_mode.addItems(["Single File", "Single File (Parallel)", "One PDF per Employee (Parallel)"])
 
         self.btn_overall = QPushButton("📊 Executive Summary Report (PDF)")
         self.btn_overall.setEnabled(False)
         self.btn_overall.setStyleSheet("background-color: #0078D7; color: white;")
         self.btn_overall.clicked.connect(self.export_overall_pdf)
+        self.chk_vector = QCheckBox("Vector charts")
+        self.chk_vector.setToolTip("Embed the executive charts as SVG (sharp at any zoom; needs svglib) instead of PNG")
+
+        self.btn_xlsx = QPushButton("📗 Summary (Excel)")
+        self.btn_xlsx.setEnabled(False)
+        self.btn_xlsx.clicked.connect(self.export_summary_xlsx)
+
+        self.btn_cancel = QPushButton("⛔ Cancel")
+        self.btn_cancel.setToolTip("Stop the selected jobs, or every running and queued job if none is selected")
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self.cancel_jobs)
         
         ctrl_layout.addWidget(self.btn_run)
+        ctrl_layout.addWidget(self.btn_append)
+        ctrl_layout.addWidget(self.btn_batch)
         ctrl_layout.addWidget(self.btn_pdf)
+        ctrl_layout.addWidget(self.combo_pdf_mode)
         ctrl_layout.addWidget(self.btn_overall)
+        ctrl_layout.addWidget(self.chk_vector)
+        ctrl_layout.addWidget(self.btn_xlsx)
+        ctrl_layout.addWidget(self.btn_cancel)
         layout.addLayout(ctrl_layout)
+
+        opt_layout = QHBoxLayout()
+        self.chk_trace = QCheckBox("Save stage timings to a JSON trace file")
+        self.chk_trace.setChecked(bool(self.trace_path))
+        self.chk_trace.toggled.connect(self.choose_trace_path)
+        opt_layout.addWidget(self.chk_trace)
+        opt_layout.addStretch()
+        opt_layout.addWidget(QLabel("Worker processes:"))
+        self.spin_workers = QSpinBox()
+        self.spin_workers.setRange(1, os.cpu_count() or 1)
+        self.spin_workers.setToolTip("Split the analysis of very large files by employee across this many "
+                                     "processes (1 = in this process)")
+        opt_layout.addWidget(self.spin_workers)
+        layout.addLayout(opt_layout)
         
         self.pbar = QProgressBar()
         layout.addWidget(self.pbar)
+        self.lbl_append = QLabel("")
+        layout.addWidget(self.lbl_append)
+        layout.addWidget(QLabel("Jobs:"))
+        self.list_jobs = QListWidget()
+        self.list_jobs.setMaximumHeight(110)
+        self.list_jobs.setSelectionMode(QListWidget.ExtendedSelection)
+        layout.addWidget(self.list_jobs)
         layout.addWidget(QLabel("Processing Log:"))
         self.log_console = QTextEdit()
         self.log_console.setReadOnly(True)
@@ -419,8 +907,28 @@ class AttendanceApp(QMainWindow):
         sb = self.log_console.verticalScrollBar()
         sb.setValue(sb.maximum())
 
-    def start_processing(self):
-        if self.raw_df is None:
+    def choose_trace_path(self, on):
+        if on and not self.trace_path:
+            self.trace_path, _ = QFileDialog.getSaveFileName(self, "Save Stage Trace", "attendance_trace.json", "JSON Files (*.json)")
+            if not self.trace_path:
+                self.chk_trace.setChecked(False)
+
+    def record_trace(self, prof, operation):
+        # Adds one run's or export's stages to the session trace and rewrites the file
+        self.trace.stages.extend(dict(rec, operation=operation) for rec in prof.stages)
+        if self.chk_trace.isChecked() and self.trace_path:
+            try:
+                self.trace.dump(self.trace_path, source=self.file_path)
+            except OSError as e:
+                self.log(f"⚠️ Could not write stage trace: {e}")
+
+    def start_append(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Open New Punches", "", "Excel Files (*.xlsx *.xls);;CSV Files (*.csv)")
+        if not path: return
+        self.start_processing(append_path=path)
+
+    def start_processing(self, *, append_path=None):
+        if self.raw_df is None and self.file_path is None:
             QMessageBox.warning(self, "Missing Data", "Please load a file first.")
             self.tabs.setCurrentIndex(0)
             return
@@ -429,296 +937,247 @@ class AttendanceApp(QMainWindow):
             self.tabs.setCurrentIndex(1)
             return
 
+        col_map, holidays = self.current_rules()
+        self.btn_run.setEnabled(False)
+        self.btn_append.setEnabled(False)
+        self.log_console.clear()
+        self.pbar.setValue(0)
+        self.worker = AnalysisWorker(self.raw_df, self.shifts, holidays, col_map, source_path=self.file_path,
+                                     store=self.store, file_key=self.file_key, previous=self.last_run,
+                                     append_path=append_path, workers=self.spin_workers.value())
+        self.worker.signals.progress.connect(self.pbar.setValue)
+        self.submit_job(self.worker, self.on_process_finished)
+
+    def current_rules(self):
+        # (column mapping, holidays) as set on the Import and Rules tabs
         col_map = {"name": self.combo_name.currentText(), "date": self.combo_date.currentText(),
                    "in": self.combo_in.currentText(), "out": self.combo_out.currentText()}
+        if self.chk_swipes.isChecked():
+            col_map.update(out=col_map['in'], swipes=True)
         hol_str = self.txt_holidays.text()
         holidays = set()
         if hol_str:
             try: holidays = {pd.to_datetime(d.strip()) for d in hol_str.split(',') if d.strip()}
             except: self.log("⚠️ Warning: Could not parse holidays.")
+        return col_map, holidays
 
-        self.btn_run.setEnabled(False)
+    def start_batch_files(self):
+        paths, _ = QFileDialog.getOpenFileNames(self, "Open Punch Files", "", "Excel Files (*.xlsx *.xls);;CSV Files (*.csv)")
+        if paths: self.start_batch(paths)
+
+    def start_batch_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Folder of Punch Files")
+        if folder: self.start_batch([folder])
+
+    def start_batch(self, sources):
+        if not self.combo_name.currentText():
+            QMessageBox.warning(self, "Missing Columns", "Load one of the files first to map its columns; "
+                                "the mapping is used for every file in the batch.")
+            self.tabs.setCurrentIndex(0)
+            return
+        if not self.shifts:
+            QMessageBox.warning(self, "Missing Rules", "Please add Shift Periods.")
+            self.tabs.setCurrentIndex(1)
+            return
+        try:
+            shift_cal = engine.ShiftCalendar(self.shifts)
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid Rules", str(e))
+            return
+        col_map, holidays = self.current_rules()
+        self.btn_batch.setEnabled(False)
         self.log_console.clear()
         self.pbar.setValue(0)
-        self.worker = AnalysisWorker(self.raw_df, self.shifts, holidays, col_map)
-        self.worker.log_signal.connect(self.log)
-        self.worker.progress_signal.connect(self.pbar.setValue)
-        self.worker.finished_signal.connect(self.on_process_finished)
-        self.worker.start()
+        job = batch_analysis_job(sources, col_map, shift_cal, holidays)
+        job.signals.progress.connect(self.pbar.setValue)
+        self.submit_job(job, lambda result, error, job: self.on_batch_finished(result, error, job, shift_cal))
+
+    def on_batch_finished(self, result, error, job, shift_cal):
+        self.btn_batch.setEnabled(True)
+        if error == CANCELLED:
+            self.log("⛔ Batch analysis cancelled.")
+            return
+        if error:
+            QMessageBox.critical(self, "Batch Error", error)
+            return
+        results, failed = result
+        summary_df, status_df, names = batch.combine(results)
+        context = {
+            "names": names,
+            "summary_df": summary_df,
+            "status_df": status_df,
+            "min_date": shift_cal.start,
+            "max_date": shift_cal.end,
+            "batch": results,
+        }
+        self.summary_df = summary_df
+        self.context_data = context
+        # Append merges into a single-file run; the one before this batch no longer matches what is shown
+        self.last_run = None
+        self.btn_append.setEnabled(False)
+        self.lbl_append.setText("")
+        self.log(f"\n✅ Batch Complete: {len(results)} files, {len(summary_df)} employees.")
+        self.log(str(batch.file_totals(results)))
+        for path, err in failed.items():
+            self.log(f"❌ {os.path.basename(path)}: {err}")
+        self.btn_pdf.setEnabled(True)
+        self.btn_overall.setEnabled(True)
+        self.btn_xlsx.setEnabled(True)
+        self.show_results(summary_df, context)
+        QMessageBox.information(self, "Success", f"Batch analysis complete: {len(results)} files"
+                                + (f", {len(failed)} failed (see log)." if failed else "."))
 
-    def on_process_finished(self, summary_df, context, error):
+    def on_process_finished(self, result, error, job=None):
         self.btn_run.setEnabled(True)
+        self.btn_append.setEnabled(self.last_run is not None)
+        if error == CANCELLED:
+            self.log("⛔ Analysis cancelled.")
+            return
         if error:
             QMessageBox.critical(self, "Processing Error", error)
             return
+        summary_df, context = result
         self.summary_df = summary_df
         self.context_data = context
+        self.last_run = context
         self.log("\n✅ Analysis Complete!")
         self.log(str(summary_df.head()))
         self.btn_pdf.setEnabled(True)
         self.btn_overall.setEnabled(True)
+        self.btn_xlsx.setEnabled(True)
+        self.btn_append.setEnabled(context["punch_grid"] is not None)
+        if context["appended"]:
+            added = context["appended"]
+            self.lbl_append.setText(f"➕ Last append: {added['rows']:,} rows and {added['days']} new days added, "
+                                    f"{added['merged']:,} days extended ({added['skipped']:,} duplicate rows skipped)")
+        self.show_results(summary_df, context)
         QMessageBox.information(self, "Success", "Analysis complete.")
 
+    # --- TAB 4: RESULTS ---
+    def setup_results_tab(self):
+        layout = QVBoxLayout(self.tab_results)
+        filter_bar = QHBoxLayout()
+        filter_bar.addWidget(QLabel("Filter by Name:"))
+        self.txt_filter = QLineEdit()
+        self.txt_filter.setPlaceholderText("Type part of a name...")
+        self.txt_filter.setClearButtonEnabled(True)
+        self.txt_filter.textChanged.connect(self.apply_result_filter)
+        filter_bar.addWidget(self.txt_filter)
+        self.lbl_results = QLabel("Run the analysis to see results.")
+        filter_bar.addWidget(self.lbl_results)
+        layout.addLayout(filter_bar)
+
+        splitter = QSplitter(Qt.Vertical)
+        self.summary_view = QTableView()
+        self.status_view = QTableView()
+        for title, view in (("Summary (click a header to sort)", self.summary_view),
+                            ("Per-Day Status", self.status_view)):
+            group = QGroupBox(title)
+            box = QVBoxLayout()
+            view.setAlternatingRowColors(True)
+            view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+            box.addWidget(view)
+            group.setLayout(box)
+            splitter.addWidget(group)
+        layout.addWidget(splitter)
+
+    def show_results(self, summary_df, context):
+        status = engine.status_frame(context['status_df'], context['names'])
+        for view, df in ((self.summary_view, summary_df), (self.status_view, status)):
+            view.setSortingEnabled(False)
+            view.setModel(PandasModel(df))
+            # No sort indicator: rows stay in analysis order until a header is clicked
+            view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+            view.setSortingEnabled(True)
+        self.apply_result_filter(self.txt_filter.text())
+
+    def apply_result_filter(self, text):
+        summary_model = self.summary_view.model()
+        if summary_model is None: return
+        for view in (self.summary_view, self.status_view):
+            view.model().set_filter(text.strip())  # Name is column 0 in both
+        self.lbl_results.setText(f"{summary_model.visible_rows():,} of {summary_model.total_rows():,} employees | "
+                                 f"{self.status_view.model().visible_rows():,} days")
+
     # --- EXPORT: INDIVIDUAL REPORTS ---
     def export_pdf(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Save Individual Report", "attendance_detailed.pdf", "PDF Files (*.pdf)")
+        mode = self.combo_pdf_mode.currentIndex()
+        if mode == PDF_MODE_PER_EMPLOYEE:
+            path = QFileDialog.getExistingDirectory(self, "Folder for Individual Reports")
+        else:
+            path, _ = QFileDialog.getSaveFileName(self, "Save Individual Report", "attendance_detailed.pdf", "PDF Files (*.pdf)")
         if not path: return
-        try:
+
+        names = self.context_data['names']
+        args = (names, self.context_data['status_df'], self.context_data['min_date'], self.context_data['max_date'])
+        if mode == PDF_MODE_SINGLE:
             self.log("Generating Detailed PDF...")
-            doc = SimpleDocTemplate(path, pagesize=A4, rightMargin=40, leftMargin=40, topMargin=30, bottomMargin=30)
-            elements = []
-            styles = getSampleStyleSheet()
-            
-            title_style = ParagraphStyle('MainTitle', parent=styles['Heading1'], alignment=1, fontSize=16, spaceAfter=10)
-            
-            df = self.context_data['clean_df']
-            col_map = self.context_data['col_map']
-            min_d = self.context_data['min_date']
-            max_d = self.context_data['max_date']
-            shifts = self.context_data['shifts']
-            holidays = self.context_data['holidays']
-            names = df[col_map['name']].unique()
-            
-            for name in names:
-                person_df = df[df[col_map['name']] == name]
-                table_data = [["Date", "In Time", "Out Time", "Status"]]
-                row_colors = [] 
-                
-                cnt_late = 0
-                cnt_early = 0
-                cnt_absent = 0
-                cnt_suspicious = 0
-                
-                row_idx = 1
-
-                for date in pd.date_range(start=min_d, end=max_d):
-                    if date.weekday() == 6 or date in holidays: continue
-                    shift = next((s for s in shifts if s['start'] <= date <= s['end']), None)
-                    if not shift: continue
-
-                    record = person_df[person_df[col_map['date']] == date]
-                    cin, cout = None, None
-                    if not record.empty:
-                        cin = self.worker.parse_time(record[col_map['in']].values[0])
-                        cout = self.worker.parse_time(record[col_map['out']].values[0])
-
-                    req_out = shift['friout'] if date.weekday() == 4 else shift['cout']
-                    flags, bg_col = check_attendance_status(cin, cout, shift['cin'], req_out)
-
-                    if "Late" in flags: cnt_late += 1
-                    if "Early" in flags: cnt_early += 1
-                    if "Absent" in flags: cnt_absent += 1
-                    if "Suspicious (No In)" in flags: cnt_suspicious += 1
-
-                    table_data.append([
-                        date.strftime("%d-%b (%a)"),
-                        cin.strftime("%H:%M") if cin else "-",
-                        cout.strftime("%H:%M") if cout else "-",
-                        ", ".join(flags)
-                    ])
-                    
-                    if bg_col != colors.white:
-                        row_colors.append((row_idx, bg_col))
-                    row_idx += 1
-
-                elements.append(Paragraph("ATTENDANCE REPORT", title_style))
-                
-                info_data = [
-                    [f"Name: {name}", f"Date Range: {min_d.strftime('%Y-%m-%d')} to {max_d.strftime('%Y-%m-%d')}"],
-                    [f"Lates: {cnt_late} | Early: {cnt_early} | Absent: {cnt_absent} | Suspicious: {cnt_suspicious}", ""]
-                ]
-                t_info = Table(info_data, colWidths=[300, 200])
-                t_info.setStyle(TableStyle([
-                    ('FONTNAME', (0,0), (-1,-1), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0,0), (-1,-1), 10),
-                    ('BOTTOMPADDING', (0,0), (-1,-1), 6),
-                ]))
-                elements.append(t_info)
-                elements.append(Spacer(1, 10))
-
-                t = Table(table_data, colWidths=[100, 80, 80, 200])
-                tbl_style_cmds = [
-                    ('BACKGROUND', (0,0), (-1,0), colors.black),
-                    ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-                    ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-                    ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-                    ('ALIGN', (1,0), (2,-1), 'CENTER'),
-                ]
-                
-                for r_idx, colr in row_colors:
-                    tbl_style_cmds.append(('BACKGROUND', (0, r_idx), (-1, r_idx), colr))
-
-                t.setStyle(TableStyle(tbl_style_cmds))
-                elements.append(t)
-                elements.append(Spacer(1, 20))
-
-                payroll_data = [
-                    ["PAYROLL CALCULATION & ACKNOWLEDGMENT", "", ""],
-                    ["Total Amount: _____________", "Per Day Ded.: _____________", "Ded. Days: _____________"],
-                    ["Ded. Amount: _____________", "Payable Amt: _____________", ""],
-                    ["", "", ""], 
-                    ["Receiving Date: _____________", "Signature: __________________________", ""]
-                ]
-                
-                t_pay = Table(payroll_data, colWidths=[170, 170, 170])
-                t_pay.setStyle(TableStyle([
-                    ('SPAN', (0,0), (-1,0)), 
-                    ('ALIGN', (0,0), (-1,0), 'LEFT'),
-                    ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0,0), (-1,0), 10),
-                    ('BOTTOMPADDING', (0,0), (-1,0), 10),
-                    ('BOTTOMPADDING', (0,1), (-1,2), 15), 
-                    ('BOTTOMPADDING', (0,4), (-1,4), 5),
-                    ('BOX', (0,0), (-1,-1), 1, colors.black),
-                    ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-                ]))
-                
-                elements.append(KeepTogether(t_pay))
-                elements.append(PageBreak())
-
-            doc.build(elements)
-            self.log(f"✅ Detailed PDF Saved: {path}")
-            QMessageBox.information(self, "Success", "Detailed Report Generated!")
-        except Exception as e:
-            self.log(str(e))
-            QMessageBox.critical(self, "Error", str(e))
+        else:
+            self.log(f"Generating Detailed PDF ({os.cpu_count()} worker processes)...")
+        self.submit_job(detailed_report_job(path, args, mode), self.on_export_finished)
 
     # --- NEW: EXECUTIVE SUMMARY WITH GRAPHS ---
     def export_overall_pdf(self):
         path, _ = QFileDialog.getSaveFileName(self, "Save Executive Report", "attendance_executive_summary.pdf", "PDF Files (*.pdf)")
         if not path: return
-        try:
-            self.log("Generating Executive Report with Graphs...")
-            
-            # 1. Setup Data for Visuals
-            total_present = self.summary_df['Present'].sum()
-            total_absent = self.summary_df['Absents'].sum()
-            total_late = self.summary_df['Lates'].sum()
-            total_early = self.summary_df['Early'].sum()
-            
-            top_lates = self.summary_df.nlargest(5, 'Lates')
-            top_absents = self.summary_df.nlargest(5, 'Absents')
-
-            # 2. Setup Document
-            doc = SimpleDocTemplate(path, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=40, bottomMargin=40)
-            elements = []
-            styles = getSampleStyleSheet()
-            
-            # --- PAGE 1: VISUAL ANALYTICS ---
-            elements.append(Paragraph("Executive Attendance Summary", styles['Title']))
-            elements.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d')}", styles['Normal']))
-            elements.append(Spacer(1, 20))
-
-            # Helper to Convert Matplotlib Plot to ReportLab Image
-            def fig_to_image(fig):
-                buf = io.BytesIO()
-                fig.savefig(buf, format='png', dpi=100, bbox_inches='tight')
-                buf.seek(0)
-                plt.close(fig) # Close to free memory
-                return RLImage(buf, width=450, height=250)
-
-            # GRAPH 1: Pie Chart (Overall Distribution)
-            fig1, ax1 = plt.subplots(figsize=(6, 3.5))
-            labels = ['Present', 'Absent', 'Late', 'Early']
-            sizes = [total_present, total_absent, total_late, total_early]
-            colors_list = ['#4CAF50', '#F44336', '#FF9800', '#2196F3'] # Green, Red, Orange, Blue
-            wedges, texts, autotexts = ax1.pie(sizes, labels=labels, autopct='%1.1f%%', colors=colors_list, startangle=90)
-            ax1.axis('equal')
-            plt.title("Overall Attendance Distribution")
-            plt.setp(autotexts, size=8, weight="bold", color="white")
-            
-            elements.append(fig_to_image(fig1))
-            elements.append(Spacer(1, 20))
-
-            # GRAPH 2: Top 5 Late Comers (Bar Chart)
-            if not top_lates.empty and top_lates['Lates'].sum() > 0:
-                fig2, ax2 = plt.subplots(figsize=(7, 3.5))
-                ax2.bar(top_lates['Name'], top_lates['Lates'], color='#FF9800')
-                ax2.set_title("Top 5 Employees: Late Arrivals")
-                ax2.set_ylabel("Count")
-                plt.xticks(rotation=15, ha='right', fontsize=8)
-                plt.grid(axis='y', linestyle='--', alpha=0.7)
-                elements.append(fig_to_image(fig2))
-                elements.append(Spacer(1, 10))
-
-            # GRAPH 3: Top 5 Absentees (Bar Chart)
-            if not top_absents.empty and top_absents['Absents'].sum() > 0:
-                fig3, ax3 = plt.subplots(figsize=(7, 3.5))
-                ax3.bar(top_absents['Name'], top_absents['Absents'], color='#F44336')
-                ax3.set_title("Top 5 Employees: Absences")
-                ax3.set_ylabel("Count")
-                plt.xticks(rotation=15, ha='right', fontsize=8)
-                plt.grid(axis='y', linestyle='--', alpha=0.7)
-                elements.append(fig_to_image(fig3))
-            
-            elements.append(PageBreak())
-
-            # --- PAGE 2+: HEATMAP DATA TABLE ---
-            elements.append(Paragraph("Detailed Employee Statistics (Heatmap)", styles['Heading2']))
-            elements.append(Spacer(1, 10))
-
-            headers = ["Name", "Present", "Late", "Early", "Absent", "Suspic."]
-            data = [headers]
-            
-            for _, row in self.summary_df.iterrows():
-                data.append([
-                    str(row['Name']),
-                    str(row['Present']),
-                    str(row['Lates']),
-                    str(row['Early']),
-                    str(row['Absents']),
-                    str(row['Suspicious'])
-                ])
-
-            t = Table(data, colWidths=[150, 60, 60, 60, 60, 60])
-            
-            # Base Style
-            style_cmds = [
-                ('BACKGROUND', (0,0), (-1,0), colors.darkslategrey),
-                ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-                ('GRID', (0,0), (-1,-1), 1, colors.black),
-                ('FONTSIZE', (0,0), (-1,-1), 10),
-                ('ALIGN', (1,0), (-1,-1), 'CENTER'),
-                ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-            ]
-
-            # Heatmap Logic (Conditional Formatting)
-            # Define severity colors
-            c_safe = colors.white
-            c_warn = colors.Color(1, 0.9, 0.7) # Light Orange
-            c_bad  = colors.Color(1, 0.6, 0.6) # Light Red
-            c_crit = colors.Color(0.8, 0.2, 0.2) # Dark Red (Text White)
-
-            for i, row in enumerate(data[1:], start=1):
-                # Late Column (Index 2)
-                lates = int(row[2])
-                if lates >= 5: 
-                    style_cmds.append(('BACKGROUND', (2, i), (2, i), c_bad))
-                elif lates >= 3:
-                    style_cmds.append(('BACKGROUND', (2, i), (2, i), c_warn))
-                
-                # Absent Column (Index 4)
-                absents = int(row[4])
-                if absents >= 3:
-                    style_cmds.append(('BACKGROUND', (4, i), (4, i), c_bad))
-                elif absents >= 1:
-                    style_cmds.append(('BACKGROUND', (4, i), (4, i), c_warn))
-                
-                # Suspicious Column (Index 5)
-                susp = int(row[5])
-                if susp > 0:
-                    style_cmds.append(('BACKGROUND', (5, i), (5, i), colors.lightgrey))
-
-            t.setStyle(TableStyle(style_cmds))
-            elements.append(t)
-            
-            doc.build(elements)
-            self.log(f"✅ Executive Report Saved: {path}")
-            QMessageBox.information(self, "Success", "Executive Report with Graphs Generated!")
+        self.log("Generating Executive Report with Graphs...")
+        chart_format = "svg" if self.chk_vector.isChecked() else "png"
+        self.submit_job(executive_report_job(path, self.summary_df, chart_format), self.on_export_finished)
 
-        except Exception as e:
-            self.log(str(e))
-            QMessageBox.critical(self, "Error", str(e))
+    def export_summary_xlsx(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Summary Workbook", "attendance_summary.xlsx", "Excel Files (*.xlsx)")
+        if not path: return
+        self.submit_job(summary_xlsx_job(path, self.summary_df, self.context_data.get("batch")),
+                        self.on_export_finished)
+
+    def on_export_finished(self, files, error, job):
+        if error == CANCELLED:
+            self.log(f"⛔ {job.title}: cancelled.")
+            return
+        if error:
+            self.log(error)
+            QMessageBox.critical(self, "Error", error)
+            return
+        if not files:
+            # e.g. per-employee PDFs for a date window nobody worked in
+            self.log(f"ℹ️ {job.title}: nothing exported.")
+            QMessageBox.information(self, "Nothing Exported", f"{job.title}: no employees to export.")
+            return
+        if len(files) > 1:
+            self.log(f"✅ {len(files)} Individual PDFs Saved to: {os.path.dirname(files[0])}")
+        else:
+            self.log(f"✅ {job.title} Saved: {files[0]}")
+        QMessageBox.information(self, "Success", f"{job.title} generated!")
+
+    # --- BACKGROUND JOBS ---
+    def submit_job(self, job, on_finished):
+        # Queues `job`, lists it under Jobs and calls on_finished(result, error, job) when done
+        item = QListWidgetItem(f"⏳ {job.title}: queued")
+        item.setData(Qt.UserRole, job)
+        self.list_jobs.insertItem(0, item)
+        job.signals.log.connect(self.log)
+        job.signals.started.connect(lambda: item.setText(f"▶️ {job.title}: running"))
+        job.signals.progress.connect(lambda pct: item.setText(f"▶️ {job.title}: {pct}%"))
+        job.signals.finished.connect(lambda result, error: self.on_job_finished(job, item, result, error, on_finished))
+        self.jobs.submit(job)
+        self.btn_cancel.setEnabled(True)
+        return job
+
+    def on_job_finished(self, job, item, result, error, on_finished):
+        icon = {"done": "✅", "cancelled": "⛔"}.get(job.state, "❌")
+        item.setText(f"{icon} {job.title}: {job.state}")
+        self.btn_cancel.setEnabled(bool(self.jobs.active()))
+        self.record_trace(job.prof, job.operation)
+        on_finished(result, error, job)
+
+    def cancel_jobs(self):
+        # Jobs stop at their next cancellation check (queued ones right away)
+        selected = [item.data(Qt.UserRole) for item in self.list_jobs.selectedItems()]
+        targets = [job for job in selected if job in self.jobs.active()] or self.jobs.active()
+        for job in targets:
+            self.jobs.cancel(job)
+        if targets:
+            self.log(f"⛔ Cancelling {', '.join(job.title for job in targets)}...")
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
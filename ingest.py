@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # optional: the parsed-punch cache is skipped without it
+    feather = None
+
+import engine
+from profiler import NULL_PROFILER
+
+PREVIEW_ROWS = 100
+CHUNK_ROWS = 100_000
+
+# =============================================================================
+# FILE READERS
+# =============================================================================
+def excel_engine(path):
+    return 'xlrd' if path.lower().endswith('.xls') else 'openpyxl'
+
+def read_file(path, **kwargs):
+    if path.lower().endswith('.csv'):
+        return pd.read_csv(path, **kwargs)
+    return pd.read_excel(path, engine=excel_engine(path), **kwargs)
+
+def read_preview(path, nrows=PREVIEW_ROWS):
+    # Header plus the first rows only, for the import tab
+    return read_file(path, nrows=nrows)
+
+def _iter_xlsx(path, usecols, chunksize):
+    # openpyxl's read-only mode streams rows instead of loading the sheet
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        header = [f"Unnamed: {i}" if h is None else str(h) for i, h in enumerate(header)]
+        idx = [header.index(c) for c in usecols]
+        batch = []
+        for row in rows:
+            batch.append([row[i] if i < len(row) else None for i in idx])
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=usecols)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=usecols)
+    finally:
+        wb.close()
+
+def iter_chunks(path, usecols, chunksize=CHUNK_ROWS):
+    """Yields the file as DataFrames of at most `chunksize` rows, `usecols` only."""
+    lower = path.lower()
+    if lower.endswith('.csv'):
+        yield from pd.read_csv(path, usecols=usecols, chunksize=chunksize)
+    elif lower.endswith('.xls'):
+        # xlrd always parses the whole workbook; only the mapped columns are kept
+        df = pd.read_excel(path, engine='xlrd', usecols=usecols)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+    else:
+        yield from _iter_xlsx(path, usecols, chunksize)
+
+# =============================================================================
+# STREAMING INGESTION
+# =============================================================================
+def load_punches(path, col_map, min_date=None, max_date=None, chunksize=CHUNK_ROWS, log=None, cancelled=None):
+    """
+    Streams `path` in chunks, keeping only the mapped columns and typing each
+    chunk with engine.clean_punches as it arrives. Given a date window, rows
+    outside [min_date, max_date] are dropped chunk by chunk as well, so the
+    full raw frame never exists in memory. Raises engine.Cancelled between
+    chunks once `cancelled()` is true.
+    """
+    kept, rows_read = [], 0
+    for chunk in iter_chunks(path, engine.mapped_columns(col_map), chunksize):
+        if cancelled and cancelled():
+            raise engine.Cancelled()
+        rows_read += len(chunk)
+        part = engine.clean_punches(chunk, col_map, log)
+        if min_date is not None:
+            part = engine.filter_window(part, col_map['date'], min_date, max_date)
+        kept.append(part)
+        if log:
+            log(f"📥 Read {rows_read:,} rows, kept {sum(map(len, kept)):,}...")
+
+    if not kept:
+        return engine.clean_punches(pd.DataFrame(columns=engine.mapped_columns(col_map)), col_map)
+    df = pd.concat(kept, ignore_index=True)
+    # Chunks carry their own categories; re-encode once over the whole frame
+    df[col_map['name']] = df[col_map['name']].astype(object).astype('category')
+    return df
+
+# =============================================================================
+# ON-DISK CACHE OF PARSED PUNCHES
+# =============================================================================
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "attendance")
+
+class PunchStore:
+    """
+    Feather files of cleaned, typed punch frames (engine.clean_punches output)
+    keyed by file content hash and column mapping, plus the preview and last
+    mapping per file. Re-opening a file that is already cached memory-maps
+    the Feather file instead of running xlrd/openpyxl and pd.to_datetime.
+    Disabled when pyarrow is not installed.
+    """
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or os.environ.get("ATTENDANCE_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.enabled = feather is not None
+
+    @staticmethod
+    def file_key(path, block_size=1 << 20):
+        digest = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(block_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _path(self, file_key, suffix):
+        return os.path.join(self.cache_dir, f"v{CACHE_VERSION}-{file_key}{suffix}")
+
+    def _frame_path(self, file_key, col_map):
+        mapping = json.dumps([col_map[k] for k in ('name', 'date', 'in', 'out')]
+                             + (["swipes"] if col_map.get('swipes') else []))
+        return self._path(file_key, f"-{hashlib.sha1(mapping.encode()).hexdigest()[:12]}.feather")
+
+    def _write(self, df, dest):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{dest}.{os.getpid()}-{threading.get_ident()}.tmp"  # batch runs write from several threads
+        feather.write_feather(df.reset_index(drop=True), tmp, compression='uncompressed')
+        os.replace(tmp, dest)
+
+    def _read(self, src):
+        if not (self.enabled and os.path.exists(src)):
+            return None
+        return feather.read_table(src, memory_map=True).to_pandas()
+
+    def load(self, file_key, col_map):
+        return self._read(self._frame_path(file_key, col_map))
+
+    def store(self, file_key, col_map, df):
+        if self.enabled:
+            self._write(df, self._frame_path(file_key, col_map))
+
+    def load_preview(self, file_key):
+        # (preview frame, last column mapping or None), or None if not cached
+        preview = self._read(self._path(file_key, "-preview.feather"))
+        if preview is None:
+            return None
+        try:
+            with open(self._path(file_key, "-mapping.json")) as fh:
+                return preview, json.load(fh)
+        except (OSError, ValueError):
+            return preview, None
+
+    def store_preview(self, file_key, preview):
+        if self.enabled:
+            # Mixed-type cells cannot be stored as Arrow columns; the grid shows str() anyway
+            self._write(preview.astype(str), self._path(file_key, "-preview.feather"))
+
+    def store_mapping(self, file_key, col_map):
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._path(file_key, "-mapping.json"), "w") as fh:
+                json.dump(col_map, fh)
+
+# =============================================================================
+# PUNCHES FOR ANALYSIS
+# =============================================================================
+def load_window(col_map, min_date, max_date, raw_df=None, path=None, store=None, file_key=None,
+                log=None, shift_cal=None, prof=NULL_PROFILER, cancelled=None):
+    """
+    Cleaned punches inside [min_date, max_date]: memory-mapped from `store`
+    when this file/mapping is cached, else typed from `raw_df` or streamed
+    from `path`. With a store, the whole file is cleaned (so the cache can
+    serve any later shift window) and written back for next time. Swipe
+    logs are cached swipe by swipe and reduced to one row per employee-day
+    here, with `shift_cal` deciding which day overnight swipes belong to.
+    """
+    log = log or (lambda msg: None)
+    swipes = col_map.get('swipes')
+    with prof.stage("load") as rec:
+        df = store.load(file_key, col_map) if file_key else None
+        cached = df is not None
+        if cached:
+            log("⚡ Using cached parsed punches (file unchanged).")
+        elif raw_df is not None:
+            df = engine.clean_punches(raw_df, col_map, log=log, prof=prof)
+        elif file_key:
+            df = load_punches(path, col_map, log=log, cancelled=cancelled)
+        else:
+            # Low-memory mode: stream the mapped columns, filtering as we read
+            # (swipes up to the end of the next day may close an overnight shift)
+            hi = max_date + pd.Timedelta(days=2) if swipes else max_date
+            df = load_punches(path, col_map, min_date, hi, log=log, cancelled=cancelled)
+        rec["rows"] = len(df)
+
+    if file_key:
+        try:
+            if not cached:
+                store.store(file_key, col_map, df)
+            store.store_mapping(file_key, col_map)
+        except Exception as e:
+            log(f"⚠️ Could not write punch cache: {e}")
+    if swipes:
+        swipe_count = len(df)
+        with prof.stage("swipe normalize", rows=swipe_count):
+            df = engine.normalize_swipes(df, col_map, shift_cal)
+        log(f"👆 Reduced {swipe_count:,} swipes to {len(df):,} employee-days (first in / last out).")
+    with prof.stage("filter", rows=len(df)):
+        return engine.filter_window(df, col_map['date'], min_date, max_date)
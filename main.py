@@ -1,33 +1,6 @@
 import pandas as pd
 from datetime import datetime, timedelta
-
-# --- Robust Time Parser ---
-def parse_time(value):
-    """
-    Parses time from various formats including:
-    - 12-hour (e.g., 07:30 AM)
-    - 24-hour (e.g., 13:15)
-    - Excel float (e.g., 0.30138)
-    Returns None if parsing fails.
-    """
-    if pd.isna(value):
-        return None
-    if isinstance(value, float):  # Excel float time
-        try:
-            return (datetime(1899, 12, 30) + timedelta(days=value)).time()
-        except:
-            return None
-    value = str(value).strip()
-    time_formats = [
-        "%I:%M:%S %p", "%I:%M %p",  # 12-hour
-        "%H:%M:%S", "%H:%M"         # 24-hour
-    ]
-    for fmt in time_formats:
-        try:
-            return datetime.strptime(value, fmt).time()
-        except:
-            continue
-    return None
+from engine import PUNCH_CACHE, EmployeeIndex, ShiftCalendar, parse_time_column, seconds_to_time
 
 # --- Load Excel File (.xlsx) ---
 xls_path = "november_logs.xls"
@@ -88,6 +61,18 @@ for i in range(num_periods):
 
 print("\n🧭 Timetable periods recorded:", len(periods))
 
+# --- Resolve Timetable For Every Date (once, for the whole range) ---
+try:
+    shift_cal = ShiftCalendar(periods)
+except ValueError as e:
+    print("❌", e)
+    exit()
+working_days = list(shift_cal.iter_days(gazetted_holidays, start_date, end_date))
+all_days = pd.date_range(start=start_date, end=end_date)
+for date in all_days[shift_cal.resolve(all_days) < 0]:
+    if date.weekday() != 6 and date not in gazetted_holidays:
+        print(f"⚠️ No timing found for {date.date()} — skipping.")
+
 # --- Filter Date Range ---
 df = df[(df['Date'] >= start_date) & (df['Date'] <= end_date)]
 print(f"\n🔍 Filtered rows in range: {len(df)}")
@@ -106,44 +91,41 @@ if not in_col or not out_col:
     print("❌ Could not detect clock columns. Please check your Excel column headers.")
     exit()
 
+# --- Parse Clock Columns (whole column at once) ---
+for col in (in_col, out_col):
+    secs, bad = parse_time_column(df[col])
+    if bad.any():
+        print(f"⚠️ {bad.sum()} unparseable values in '{col}':", df[col][bad].unique()[:5])
+    df[col] = [seconds_to_time(s) for s in secs]
+print("🧠 Time parse cache:", PUNCH_CACHE.summary())
+
+# --- Index Rows Per Employee (built once, sliced by both passes) ---
+emp_index = EmployeeIndex(df, 'Name', 'Date')
+
 summary_rows = []
 
 # --- Process Each Employee ---
 print("\n📊 Starting Attendance Analysis...\n" + "-"*60)
-for name in df['Name'].unique():
+for name, person_df in emp_index:
     print(f"\n👤 Processing: {name}")
-    person_df = df[df['Name'] == name]
     late_count = 0
     early_count = 0
     absent_count = 0
     suspicious_count = 0
     present_count = 0
 
-    for date in pd.date_range(start=start_date, end=end_date):
-        if date.weekday() == 6 or date in gazetted_holidays:
-            continue  # Sunday or gazetted holiday
-
-        # --- Get correct timing for this date ---
-        check_in_time = check_out_time = friday_out_time = None
-        for p in periods:
-            if p['start'] <= date <= p['end']:
-                check_in_time = p['cin']
-                check_out_time = p['cout']
-                friday_out_time = p['friout']
-                break
-        if check_in_time is None:
-            print(f"⚠️ No timing found for {date.date()} — skipping.")
-            continue
+    for date, p in working_days:  # Sundays and gazetted holidays already skipped
+        check_in_time = p['cin']
+        check_out_time = p['cout']
+        friday_out_time = p['friout']
 
         record = person_df[person_df['Date'] == date]
         clock_in = None
         clock_out = None
 
         if not record.empty:
-            in_raw = record[in_col].values[0]
-            out_raw = record[out_col].values[0]
-            clock_in = parse_time(in_raw)
-            clock_out = parse_time(out_raw)
+            clock_in = record[in_col].values[0]
+            clock_out = record[out_col].values[0]
 
         # --- Decision Tree ---
         if not clock_in and not clock_out:
@@ -205,25 +187,14 @@ style_title = styles["Heading1"]
 style_subtitle = styles["Heading3"]
 style_normal = styles["Normal"]
 
-for name in df['Name'].unique():
-    person_df = df[df['Name'] == name].copy()
+for name, person_df in emp_index:
     daily_rows = []
     late_count = early_count = absent_count = present_count = 0
 
-    for date in pd.date_range(start=start_date, end=end_date):
-        if date.weekday() == 6 or date in gazetted_holidays:
-            continue
-
-        # find period
-        p = next((p for p in periods if p['start'] <= date <= p['end']), None)
-        if not p:
-            continue
-
+    for date, p in working_days:
         record = person_df[person_df['Date'] == date]
-        cin_raw = record[in_col].values[0] if not record.empty else None
-        cout_raw = record[out_col].values[0] if not record.empty else None
-        cin = parse_time(cin_raw)
-        cout = parse_time(cout_raw)
+        cin = record[in_col].values[0] if not record.empty else None
+        cout = record[out_col].values[0] if not record.empty else None
 
         status = ""
         if not cin and not cout:
@@ -0,0 +1,91 @@
+"""
+Stage-level timing for analysis runs and exports: wall time, rows per
+second and peak RSS per stage, logged as each stage finishes and
+optionally written to a JSON trace file.
+
+    prof = StageProfiler(log=print)
+    with prof.stage("time parse", rows=len(df)):
+        ...
+    prof.dump("trace.json")
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows: fall back to psutil when it is installed
+    resource = None
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far in MB (None if unknown)."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1 << 20 if sys.platform == "darwin" else 1 << 10)  # bytes on macOS, KB on Linux
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1 << 20)
+    return None
+
+def format_stage(rec):
+    parts = [f"{rec['wall_s'] * 1000:,.1f} ms"]
+    if rec.get("rows_per_s"):
+        parts.append(f"{rec['rows']:,} rows, {rec['rows_per_s']:,.0f} rows/s")
+    if rec.get("peak_rss_mb") is not None:
+        parts.append(f"peak RSS {rec['peak_rss_mb']:,.0f} MB")
+    return f"⏱️ {'  ' * rec['depth']}{rec['stage']}: " + " | ".join(parts)
+
+class StageProfiler:
+    """
+    Collects one record per stage: name, nesting depth, start (epoch
+    seconds) and wall time, rows handled (when given), rows/s and the
+    process peak RSS when the stage ended. Not thread-safe: use one per
+    worker and merge the records afterwards if needed.
+    """
+    def __init__(self, log=None):
+        self.log = log
+        self.stages = []
+        self._depth = 0
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        # The yielded record can be updated inside the block, e.g. rec["rows"] = n
+        rec = {"stage": name, "depth": self._depth, "rows": rows, "started": time.time()}
+        start = time.perf_counter()
+        self._depth += 1
+        try:
+            yield rec
+        finally:
+            self._depth -= 1
+            wall = time.perf_counter() - start
+            rows = rec["rows"]
+            rec.update(wall_s=wall, rows_per_s=rows / wall if rows and wall > 0 else None,
+                       peak_rss_mb=peak_rss_mb())
+            self.stages.append(rec)
+            if self.log:
+                self.log(format_stage(rec))
+
+    def dump(self, path, **meta):
+        # Stages in start order; `meta` (e.g. the input file) is stored alongside
+        trace = {"created": datetime.now().isoformat(timespec="seconds"), "pid": os.getpid(), **meta,
+                 "stages": sorted(self.stages, key=lambda r: r["started"])}
+        with open(path, "w") as fh:
+            json.dump(trace, fh, indent=2, default=str)
+        return path
+
+class NullProfiler:
+    """Stand-in used when no profiler is passed: stages cost nothing and are not kept."""
+    stages = ()
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        yield {"stage": name, "rows": rows}
+
+NULL_PROFILER = NullProfiler()
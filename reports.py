@@ -0,0 +1,466 @@
+import hashlib
+import io
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from datetime import datetime
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+# --- PDF Generation Imports ---
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, KeepTogether, Image as RLImage
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+try:
+    from pypdf import PdfWriter
+except ImportError:  # optional: only needed to merge parallel partial PDFs
+    PdfWriter = None
+try:
+    from svglib.svglib import svg2rlg
+except ImportError:  # optional: vector charts fall back to PNG without it
+    svg2rlg = None
+
+import engine
+from profiler import NULL_PROFILER
+
+# Grayscale/Report Colors
+COL_MINOR = colors.Color(0.92, 0.92, 0.92)
+COL_MAJOR = colors.Color(0.75, 0.75, 0.75)
+
+def status_color(mask):
+    # Row color for a per-day status mask (see check_attendance_status)
+    bits = engine.STATUS_BITS
+    if mask & (bits["Absents"] | bits["Suspicious"]): return COL_MAJOR
+    if mask & (bits["Lates"] | bits["Early"] | bits["No Out"]): return COL_MINOR
+    return colors.white
+
+# =============================================================================
+# DETAILED (INDIVIDUAL) REPORT
+# =============================================================================
+def detailed_elements(names, status_df, min_d, max_d, cancelled=None):
+    """
+    Flowables for the individual report: one page-set per employee, rendered
+    from the analysis' per-day status table (emp codes index into `names`).
+    """
+    elements = []
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('MainTitle', parent=styles['Heading1'], alignment=1, fontSize=16, spaceAfter=10)
+
+    emp = status_df['emp'].to_numpy()
+    offsets = np.searchsorted(emp, np.arange(len(names) + 1))
+    # Day ordinals repeat once per employee: format each distinct day once
+    days, day_pos = np.unique(status_df['day'].to_numpy(), return_inverse=True)
+    day_labels = np.array([d.strftime("%d-%b (%a)") for d in days.astype('datetime64[D]').tolist()],
+                          dtype=object)[day_pos]
+    in_labels = engine.format_hhmm(status_df['cin'].to_numpy())
+    out_labels = engine.format_hhmm(status_df['cout'].to_numpy())
+    masks = status_df['flags'].to_numpy()
+    bits = engine.STATUS_BITS
+
+    for i, name in enumerate(names):
+        if cancelled and cancelled():
+            raise engine.Cancelled()
+        lo, hi = offsets[i], offsets[i + 1]
+        person_masks = masks[lo:hi]
+        table_data = [["Date", "In Time", "Out Time", "Status"]]
+        table_data += [[day_labels[r], in_labels[r], out_labels[r], ", ".join(engine.status_labels(masks[r]))]
+                       for r in range(lo, hi)]
+        row_colors = [(row_idx, status_color(m)) for row_idx, m in enumerate(person_masks, start=1)
+                      if status_color(m) != colors.white]
+
+        cnt_late = int(np.count_nonzero(person_masks & bits["Lates"]))
+        cnt_early = int(np.count_nonzero(person_masks & bits["Early"]))
+        cnt_absent = int(np.count_nonzero(person_masks & bits["Absents"]))
+        cnt_suspicious = int(np.count_nonzero(person_masks & bits["Suspicious"]))
+
+        elements.append(Paragraph("ATTENDANCE REPORT", title_style))
+
+        info_data = [
+            [f"Name: {name}", f"Date Range: {min_d.strftime('%Y-%m-%d')} to {max_d.strftime('%Y-%m-%d')}"],
+            [f"Lates: {cnt_late} | Early: {cnt_early} | Absent: {cnt_absent} | Suspicious: {cnt_suspicious}", ""]
+        ]
+        t_info = Table(info_data, colWidths=[300, 200])
+        t_info.setStyle(TableStyle([
+            ('FONTNAME', (0,0), (-1,-1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0,0), (-1,-1), 10),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 6),
+        ]))
+        elements.append(t_info)
+        elements.append(Spacer(1, 10))
+
+        t = Table(table_data, colWidths=[100, 80, 80, 200])
+        tbl_style_cmds = [
+            ('BACKGROUND', (0,0), (-1,0), colors.black),
+            ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+            ('GRID', (0,0), (-1,-1), 0.5, colors.black),
+            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+            ('ALIGN', (1,0), (2,-1), 'CENTER'),
+        ]
+
+        for r_idx, colr in row_colors:
+            tbl_style_cmds.append(('BACKGROUND', (0, r_idx), (-1, r_idx), colr))
+
+        t.setStyle(TableStyle(tbl_style_cmds))
+        elements.append(t)
+        elements.append(Spacer(1, 20))
+
+        payroll_data = [
+            ["PAYROLL CALCULATION & ACKNOWLEDGMENT", "", ""],
+            ["Total Amount: _____________", "Per Day Ded.: _____________", "Ded. Days: _____________"],
+            ["Ded. Amount: _____________", "Payable Amt: _____________", ""],
+            ["", "", ""],
+            ["Receiving Date: _____________", "Signature: __________________________", ""]
+        ]
+
+        t_pay = Table(payroll_data, colWidths=[170, 170, 170])
+        t_pay.setStyle(TableStyle([
+            ('SPAN', (0,0), (-1,0)),
+            ('ALIGN', (0,0), (-1,0), 'LEFT'),
+            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0,0), (-1,0), 10),
+            ('BOTTOMPADDING', (0,0), (-1,0), 10),
+            ('BOTTOMPADDING', (0,1), (-1,2), 15),
+            ('BOTTOMPADDING', (0,4), (-1,4), 5),
+            ('BOX', (0,0), (-1,-1), 1, colors.black),
+            ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+        ]))
+
+        elements.append(KeepTogether(t_pay))
+        elements.append(PageBreak())
+
+    return elements
+
+def page_hook(total, progress=None, cancelled=None):
+    # onPage callback for doc.build: progress by page count, cancellation between pages
+    def on_page(canvas, doc):
+        if cancelled and cancelled():
+            raise engine.Cancelled()
+        if progress:
+            progress(min(doc.page, total - 1), total)
+    return on_page
+
+def build_detailed_pdf(path, names, status_df, min_d, max_d, prof=NULL_PROFILER, progress=None, cancelled=None):
+    """
+    progress(done, total) is called per page (an employee starts a new page);
+    engine.Cancelled is raised once `cancelled()` is true.
+    """
+    with prof.stage("PDF build", rows=len(status_df)):
+        doc = SimpleDocTemplate(path, pagesize=A4, rightMargin=40, leftMargin=40, topMargin=30, bottomMargin=30)
+        on_page = page_hook(max(len(names), 1), progress, cancelled)
+        doc.build(detailed_elements(names, status_df, min_d, max_d, cancelled),
+                  onFirstPage=on_page, onLaterPages=on_page)
+    if progress: progress(len(names), len(names))
+
+# =============================================================================
+# DETAILED REPORT: PARALLEL, CHUNKED
+# =============================================================================
+def split_employees(names, status_df, chunk_size):
+    # Yields (first employee, names, status rows re-based to emp 0) per chunk
+    offsets = np.searchsorted(status_df['emp'].to_numpy(), np.arange(len(names) + 1))
+    for start in range(0, len(names), chunk_size):
+        stop = min(start + chunk_size, len(names))
+        rows = status_df.iloc[offsets[start]:offsets[stop]]
+        yield start, list(names[start:stop]), rows.assign(emp=rows['emp'] - start)
+
+def employee_filenames(folder, names):
+    files, taken = [], set()
+    for name in names:
+        base = re.sub(r'[^\w\-. ]+', '_', str(name)).strip(" .") or "employee"
+        stem, n = base, 1
+        while stem.lower() in taken:
+            n += 1
+            stem = f"{base} ({n})"
+        taken.add(stem.lower())
+        files.append(os.path.join(folder, f"{stem}.pdf"))
+    return files
+
+def _render_chunk(out_paths, names, status_df, min_d, max_d):
+    # Runs in a worker process: one partial PDF, or one PDF per employee
+    if len(out_paths) == 1:
+        build_detailed_pdf(out_paths[0], names, status_df, min_d, max_d)
+    else:
+        for (_, [name], rows), out in zip(split_employees(names, status_df, 1), out_paths):
+            build_detailed_pdf(out, [name], rows, min_d, max_d)
+    return len(names)
+
+def merge_pdfs(parts, path):
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(part)
+    with open(path, "wb") as fh:
+        writer.write(fh)
+
+def build_detailed_pdf_parallel(path, names, status_df, min_d, max_d, per_employee=False,
+                                workers=None, chunk_size=None, progress=None, cancelled=None):
+    """
+    Renders the individual report on a process pool, each worker building
+    its own partial PDF for a chunk of employees. The partials are merged
+    into `path` in employee order; with per_employee, `path` is a folder
+    that receives one PDF per employee instead. progress(done, total) is
+    called as chunks finish. Once `cancelled()` is true, chunks not yet
+    started are dropped and engine.Cancelled is raised.
+    Returns the list of written files.
+    """
+    total = len(names)
+    if not per_employee and PdfWriter is None:
+        # Without pypdf the partials cannot be merged: build in-process
+        build_detailed_pdf(path, names, status_df, min_d, max_d, progress=progress, cancelled=cancelled)
+        return [path]
+
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, -(-total // (workers * 4)))
+    tmp_dir = None
+    if per_employee:
+        os.makedirs(path, exist_ok=True)
+        files = employee_filenames(path, names)
+    else:
+        tmp_dir = tempfile.mkdtemp(prefix="attendance_pdf_")
+
+    try:
+        parts = []
+        # spawn, not fork: this runs on a GUI pool thread next to other jobs
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            futures = []
+            for k, (start, chunk_names, rows) in enumerate(split_employees(names, status_df, chunk_size)):
+                if per_employee:
+                    outs = files[start:start + len(chunk_names)]
+                else:
+                    outs = [os.path.join(tmp_dir, f"part_{k:05d}.pdf")]
+                    parts.extend(outs)
+                futures.append(pool.submit(_render_chunk, outs, chunk_names, rows, min_d, max_d))
+            done = 0
+            for fut in as_completed(futures):
+                if cancelled and cancelled():
+                    for f in futures:
+                        f.cancel()
+                    raise engine.Cancelled()
+                done += fut.result()
+                if progress: progress(done, total)
+
+        if per_employee:
+            return files
+        merge_pdfs(parts, path)
+        return [path]
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+# =============================================================================
+# EXECUTIVE SUMMARY WITH GRAPHS
+# =============================================================================
+# Charts are drawn on their own matplotlib Figure with an Agg canvas (no
+# pyplot global state), so they render side by side on threads. The encoded
+# images are cached by the summary columns they show: exporting the same
+# summary again, or to another path, skips matplotlib altogether.
+CHART_COLUMNS = ["Name", "Present", "Lates", "Early", "Absents"]
+CHART_DPI = 100
+# "svg" embeds vector charts (needs svglib), "png" raster images
+CHART_FORMATS = ("png", "svg")
+CHART_SIZE = (450, 250)  # points on the page
+
+class ChartCache:
+    """Thread-safe LRU of rendered chart images: key -> list of encoded charts."""
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self._store = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            charts = self._store.get(key)
+            if charts is not None:
+                self._store.move_to_end(key)
+            return charts
+
+    def put(self, key, charts):
+        with self._lock:
+            self._store[key] = charts
+            self._store.move_to_end(key)
+            while len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+
+CHART_CACHE = ChartCache()
+
+def chart_key(summary_df, fmt, dpi=CHART_DPI):
+    hashes = pd.util.hash_pandas_object(summary_df[CHART_COLUMNS], index=False).to_numpy()
+    return hashlib.sha1(hashes.tobytes()).hexdigest(), fmt, dpi
+
+def chart_specs(summary_df):
+    # (chart kind, data) for every chart the summary has something to show in
+    totals = [summary_df[col].sum() for col in ('Present', 'Absents', 'Lates', 'Early')]
+    specs = [("pie", totals)]
+    for col in ('Lates', 'Absents'):
+        top = summary_df.nlargest(5, col)
+        if not top.empty and top[col].sum() > 0:
+            specs.append((col, (top['Name'].astype(str).tolist(), top[col].tolist())))
+    return specs
+
+def render_chart(kind, data, fmt="png", dpi=CHART_DPI):
+    """One executive chart as encoded image bytes (object-oriented Agg, safe on any thread)."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    if kind == "pie":
+        fig = Figure(figsize=(6, 3.5))
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        labels = ['Present', 'Absent', 'Late', 'Early']
+        colors_list = ['#4CAF50', '#F44336', '#FF9800', '#2196F3'] # Green, Red, Orange, Blue
+        wedges, texts, autotexts = ax.pie(data, labels=labels, autopct='%1.1f%%', colors=colors_list, startangle=90)
+        ax.axis('equal')
+        ax.set_title("Overall Attendance Distribution")
+        for t in autotexts:
+            t.set(size=8, weight="bold", color="white")
+    else:
+        names, counts = data
+        title, color = {"Lates": ("Top 5 Employees: Late Arrivals", '#FF9800'),
+                        "Absents": ("Top 5 Employees: Absences", '#F44336')}[kind]
+        fig = Figure(figsize=(7, 3.5))
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        ax.bar(names, counts, color=color)
+        ax.set_title(title)
+        ax.set_ylabel("Count")
+        for label in ax.get_xticklabels():
+            label.set(rotation=15, ha='right', fontsize=8)
+        ax.grid(axis='y', linestyle='--', alpha=0.7)
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, dpi=dpi, bbox_inches='tight')
+    return buf.getvalue()
+
+def render_charts(summary_df, fmt="png", dpi=CHART_DPI, cache=CHART_CACHE):
+    """
+    Encoded images of the executive charts, from `cache` when this summary
+    was charted before, else rendered concurrently (one thread per chart).
+    Returns (list of image bytes, cache hit).
+    """
+    key = chart_key(summary_df, fmt, dpi)
+    charts = cache.get(key) if cache is not None else None
+    if charts is not None:
+        return charts, True
+    specs = chart_specs(summary_df)
+    with ThreadPoolExecutor(max_workers=len(specs)) as pool:
+        charts = list(pool.map(lambda spec: render_chart(*spec, fmt=fmt, dpi=dpi), specs))
+    if cache is not None:
+        cache.put(key, charts)
+    return charts, False
+
+def chart_flowable(data, fmt):
+    width, height = CHART_SIZE
+    if fmt == "svg":
+        drawing = svg2rlg(io.BytesIO(data))
+        drawing.scale(width / drawing.width, height / drawing.height)
+        drawing.width, drawing.height = width, height
+        return drawing
+    return RLImage(io.BytesIO(data), width=width, height=height)
+
+# Heatmap table: severity buckets per column, computed for all rows at once
+HEATMAP_COLUMNS = ["Name", "Present", "Lates", "Early", "Absents", "Suspicious"]
+HEATMAP_HEADERS = ["Name", "Present", "Late", "Early", "Absent", "Suspic."]
+HEATMAP_COL_WIDTHS = [150, 60, 60, 60, 60, 60]
+# Rows per sub-table: about a page, so laying out (and splitting at a page end)
+# each one costs the same however many employees there are
+HEATMAP_CHUNK_ROWS = 40
+
+# Severity colors
+HEAT_WARN = colors.Color(1, 0.9, 0.7) # Light Orange
+HEAT_BAD = colors.Color(1, 0.6, 0.6) # Light Red
+
+def heatmap_buckets(summary_df):
+    # {table column: (bucket per row, color per bucket)}; bucket 0 = no highlight
+    lates = summary_df['Lates'].to_numpy()
+    absents = summary_df['Absents'].to_numpy()
+    susp = summary_df['Suspicious'].to_numpy()
+    return {
+        2: (np.select([lates >= 5, lates >= 3], [2, 1], 0), {1: HEAT_WARN, 2: HEAT_BAD}),
+        4: (np.select([absents >= 3, absents >= 1], [2, 1], 0), {1: HEAT_WARN, 2: HEAT_BAD}),
+        5: ((susp > 0).astype(int), {1: colors.lightgrey}),
+    }
+
+def bucket_ranges(bucket, col, palette, row0):
+    # One BACKGROUND command per run of equal, highlighted buckets (rows offset by row0)
+    starts = np.flatnonzero(np.diff(bucket, prepend=-1) != 0)
+    ends = np.append(starts[1:], len(bucket)) - 1
+    return [('BACKGROUND', (col, row0 + lo), (col, row0 + hi), palette[bucket[lo]])
+            for lo, hi in zip(starts.tolist(), ends.tolist()) if bucket[lo]]
+
+def heatmap_tables(summary_df, chunk_rows=HEATMAP_CHUNK_ROWS):
+    """
+    The executive heatmap as consecutive sub-tables of `chunk_rows` employees
+    (header on the first): stacked, they read as one table, but ReportLab
+    never lays out or splits more than a page of rows at a time. Cell text
+    and highlight buckets are computed column-wise, and each run of equally
+    highlighted cells gets a single style command.
+    """
+    cells = np.column_stack([summary_df[col].astype(str).to_numpy(dtype=object) for col in HEATMAP_COLUMNS]) \
+        if len(summary_df) else np.empty((0, len(HEATMAP_COLUMNS)), dtype=object)
+    buckets = heatmap_buckets(summary_df)
+    tables = []
+    for start in range(0, max(len(cells), 1), chunk_rows):
+        stop = min(start + chunk_rows, len(cells))
+        header = start == 0
+        data = ([HEATMAP_HEADERS] if header else []) + cells[start:stop].tolist()
+        style_cmds = [
+            ('GRID', (0,0), (-1,-1), 1, colors.black),
+            ('FONTSIZE', (0,0), (-1,-1), 10),
+            ('ALIGN', (1,0), (-1,-1), 'CENTER'),
+            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+        ]
+        if header:
+            style_cmds[:0] = [('BACKGROUND', (0,0), (-1,0), colors.darkslategrey),
+                              ('TEXTCOLOR', (0,0), (-1,0), colors.white)]
+        for col, (bucket, palette) in buckets.items():
+            style_cmds += bucket_ranges(bucket[start:stop], col, palette, row0=int(header))
+        tables.append(Table(data, colWidths=HEATMAP_COL_WIDTHS, style=TableStyle(style_cmds)))
+    return tables
+
+def build_executive_pdf(path, summary_df, prof=NULL_PROFILER, cancelled=None, chart_format="png", log=None):
+    # chart_format "svg" embeds vector charts; without svglib they fall back to PNG
+    if chart_format == "svg" and svg2rlg is None:
+        if log: log("⚠️ svglib not installed: embedding PNG charts instead of vector.")
+        chart_format = "png"
+
+    # 1. Setup Document
+    doc = SimpleDocTemplate(path, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=40, bottomMargin=40)
+    elements = []
+    styles = getSampleStyleSheet()
+
+    # --- PAGE 1: VISUAL ANALYTICS ---
+    elements.append(Paragraph("Executive Attendance Summary", styles['Title']))
+    elements.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d')}", styles['Normal']))
+    elements.append(Spacer(1, 20))
+
+    with prof.stage("chart render", rows=len(summary_df)) as rec:
+        charts, rec["cached"] = render_charts(summary_df, chart_format)
+        # Pie, then the top-5 bar charts, spaced as before
+        for k, data in enumerate(charts):
+            elements.append(chart_flowable(data, chart_format))
+            if k < len(charts) - 1:
+                elements.append(Spacer(1, 20 if k == 0 else 10))
+
+    elements.append(PageBreak())
+
+    # --- PAGE 2+: HEATMAP DATA TABLE ---
+    elements.append(Paragraph("Detailed Employee Statistics (Heatmap)", styles['Heading2']))
+    elements.append(Spacer(1, 10))
+
+    with prof.stage("heatmap table", rows=len(summary_df)):
+        elements.extend(heatmap_tables(summary_df))
+
+    with prof.stage("PDF build", rows=len(summary_df)):
+        on_page = page_hook(1, cancelled=cancelled)
+        doc.build(elements, onFirstPage=on_page, onLaterPages=on_page)